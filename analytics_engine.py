@@ -2,102 +2,150 @@
 
 from __future__ import annotations
 
-import calendar
-from collections import Counter, defaultdict
+import functools
+import json
+import time
+from collections import namedtuple
+from collections.abc import Iterator
+from datetime import date
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 from rich.panel import Panel
 from rich.table import Table
 
 from config import load_config
-from notion_bridge import fetch_all_trades
-from utils import calc_r_multiple, console, fmt_pct, fmt_r
+from models import TRADE_ROW_FIELDS
+from notion_bridge import fetch_all_trades, trade_cache_path
+from utils import calc_r_multiples_np, console, fmt_pct_text, fmt_r, fmt_r_text, month_bounds
+
+
+# ── 列式视图 ─────────────────────────────────────────────────────
+
+_NUMERIC_COLUMNS = frozenset({
+    "entry_price", "position_pct", "profit_target", "risk_reward", "win_rate", "price_stop",
+    "familiarity", "actual_exit", "actual_return_pct", "r_multiple", "deviation_pct",
+})
+
+
+_CATEGORY_COLUMNS = ("direction", "entry_emotion", "status")
+_TEXT_COLUMNS = tuple(f for f in TRADE_ROW_FIELDS if f not in _NUMERIC_COLUMNS and f not in _CATEGORY_COLUMNS)
+
+# 预计算的状态掩码列: 已关闭 / 已关闭且有 R 值 / 计划中或持仓中
+_MASK_COLUMNS = ("is_closed", "is_scored", "is_active")
+
+
+def build_trade_frame(trades: list[dict]) -> pd.DataFrame:
+    """将 _parse_page 产出的交易记录直接转为列式 DataFrame (列为 TRADE_ROW_FIELDS)，后续分析均基于列运算。"""
+    df = pd.DataFrame.from_records(trades, columns=TRADE_ROW_FIELDS)
+    # from_records 会把文本列中的 None 转成 NaN; 还原为 None, 与原始记录一致
+    for name in _TEXT_COLUMNS:
+        if df[name].hasnans:
+            df[name] = df[name].astype(object).where(df[name].notna(), None)
+    # 方向/情绪/状态词表极小, 字典编码为 int8 codes, 比较与分组只作用于整数; 状态掩码只算一次, 各分析函数直接复用
+    df = df.astype({**{name: np.float64 for name in _NUMERIC_COLUMNS},
+                    **{name: "category" for name in _CATEGORY_COLUMNS}})
+    status = df["status"]
+    df["is_closed"] = (status == "CLOSED").to_numpy(dtype=bool)
+    # 在 Notion 中手动平仓的记录没有回写 R: 有出场价且入场/止损齐全时按价格向量化补算 (只补缺失值)
+    missing = (df["is_closed"] & df["r_multiple"].isna() & df["actual_exit"].notna()
+               & (df["entry_price"] > 0) & (df["price_stop"] > 0)).to_numpy()
+    if missing.any():
+        rows = df.loc[missing]
+        df.loc[missing, "r_multiple"] = calc_r_multiples_np(
+            rows["entry_price"], rows["actual_exit"], rows["price_stop"], rows["direction"])
+    df["is_scored"] = df["is_closed"] & df["r_multiple"].notna()
+    df["is_active"] = status.isin(("PLANNED", "ACTIVE")).to_numpy(dtype=bool)
+    return df
 
 
 # ── 统计计算 ─────────────────────────────────────────────────────
 
-def calc_statistics(trades: list[dict]) -> dict:
+def calc_statistics(df: pd.DataFrame) -> dict:
     """计算核心统计指标。"""
-    closed = [t for t in trades if t["status"] == "CLOSED" and t["actual_exit"] is not None]
-    if not closed:
-        return {"total": len(trades), "closed": 0, "win_rate": 0, "avg_r": 0,
+    mask = df["is_closed"] & df["actual_exit"].notna()
+    r_arr = df.loc[mask, "r_multiple"].fillna(0.0).to_numpy(dtype=np.float64)
+    n = len(r_arr)
+    if not n:
+        return {"total": len(df), "closed": 0, "win_rate": 0, "avg_r": 0,
                 "best_r": 0, "worst_r": 0, "total_r": 0, "max_drawdown": 0, "r_values": []}
 
-    wins = [t for t in closed if (t["r_multiple"] or 0) > 0]
-    r_values = [t["r_multiple"] or 0 for t in closed]
+    wins = int((r_arr > 0).sum())
 
     # 最大回撤 (基于累计 R)
-    cumulative = pd.Series(r_values).cumsum()
-    peak = cumulative.cummax()
-    drawdown = cumulative - peak
-    max_dd = drawdown.min()
+    cumulative = r_arr.cumsum()
+    peak = np.maximum.accumulate(cumulative)
+    max_dd = float((cumulative - peak).min())
+    total_r = float(cumulative[-1])
 
     return {
-        "total": len(trades),
-        "closed": len(closed),
-        "wins": len(wins),
-        "losses": len(closed) - len(wins),
-        "win_rate": len(wins) / len(closed) if closed else 0,
-        "avg_r": sum(r_values) / len(r_values),
-        "best_r": max(r_values),
-        "worst_r": min(r_values),
-        "total_r": sum(r_values),
+        "total": len(df),
+        "closed": n,
+        "wins": wins,
+        "losses": n - wins,
+        "win_rate": wins / n,
+        "avg_r": total_r / n,
+        "best_r": float(r_arr.max()),
+        "worst_r": float(r_arr.min()),
+        "total_r": total_r,
         "max_drawdown": max_dd,
-        "r_values": r_values,
+        "r_values": r_arr.tolist(),
     }
 
 
 # ── 高光时刻 ─────────────────────────────────────────────────────
 
-def find_highlights(trades: list[dict]) -> list[dict]:
+_CALM_EMOTIONS = ("calm", "confident", "exploratory")
+
+# 模块级定义, 结果可被 pickle (Streamlit 缓存需要)
+Highlight = namedtuple("Highlight", TRADE_ROW_FIELDS)
+
+
+def find_highlights(df: pd.DataFrame) -> list[Highlight]:
     """找出 R 倍数最高且情绪冷静的交易。"""
-    closed = [t for t in trades if t["status"] == "CLOSED" and t["r_multiple"] is not None]
-    calm_emotions = {"calm", "confident", "exploratory"}
-    highlights = [t for t in closed if t.get("entry_emotion") in calm_emotions and t["r_multiple"] > 0]
-    highlights.sort(key=lambda x: x["r_multiple"], reverse=True)
-    return highlights[:5]
+    mask = df["is_scored"] & (df["r_multiple"] > 0) & df["entry_emotion"].isin(_CALM_EMOTIONS)
+    # 部分选择 top-5, 无需对全部候选排序 (heapq.nlargest 的列式等价)
+    top = df.loc[mask, list(TRADE_ROW_FIELDS)].nlargest(5, "r_multiple", keep="first")
+    return list(map(Highlight._make, top.itertuples(index=False, name=None)))
 
 
 # ── 错误指纹 ─────────────────────────────────────────────────────
 
-def find_error_fingerprints(trades: list[dict]) -> dict:
+_PERIOD_EDGES = np.array([10, 14, 16])
+_PERIOD_LABELS = ("开盘 (pre-10)", "盘中 (10-14)", "收盘前 (14-16)", "盘后 (16+)")
+
+
+def find_error_fingerprints(df: pd.DataFrame) -> dict:
     """分析亏损单的时间段和情绪模式。"""
-    losers = [t for t in trades if t["status"] == "CLOSED" and (t["r_multiple"] or 0) < 0]
-    if not losers:
+    losers = df[df["is_scored"] & (df["r_multiple"] < 0)]
+    if losers.empty:
         return {"by_emotion": {}, "by_period": {}, "patterns": []}
 
-    # 按情绪分组
-    by_emotion = defaultdict(list)
-    for t in losers:
-        by_emotion[t.get("entry_emotion", "unknown")].append(t["r_multiple"])
-
-    emotion_stats = {k: {"count": len(v), "avg_r": sum(v) / len(v), "total_r": sum(v)}
-                     for k, v in by_emotion.items()}
-
-    # 按时间段分组 (基于创建时间的小时)
-    by_period = defaultdict(list)
-    for t in losers:
-        created = t.get("created", "")
-        if created:
-            try:
-                hour = pd.Timestamp(created).hour
-                if hour < 10:
-                    period = "开盘 (pre-10)"
-                elif hour < 14:
-                    period = "盘中 (10-14)"
-                elif hour < 16:
-                    period = "收盘前 (14-16)"
-                else:
-                    period = "盘后 (16+)"
-                by_period[period].append(t["r_multiple"])
-            except Exception:
-                pass
-
-    period_stats = {k: {"count": len(v), "avg_r": sum(v) / len(v)}
-                    for k, v in by_period.items()}
+    # 按情绪分组: 直接对 int8 codes 做 bincount, 按首次出现顺序输出; 缺失情绪 (code -1) 单独成组, 键为 None
+    r_arr = losers["r_multiple"].to_numpy(dtype=np.float64)
+    emotion = losers["entry_emotion"].array
+    n_cat = len(emotion.categories)
+    codes = np.where(emotion.codes >= 0, emotion.codes, n_cat)
+    labels = [*emotion.categories, None]
+    emo_counts = np.bincount(codes, minlength=n_cat + 1)
+    emo_sums = np.bincount(codes, weights=r_arr, minlength=n_cat + 1)
+    emotion_stats = {labels[i]: {"count": int(emo_counts[i]), "avg_r": float(emo_sums[i] / emo_counts[i]),
+                                 "total_r": float(emo_sums[i])}
+                     for i in pd.unique(codes)}
+
+    # 按时间段分组 (基于创建时间的小时): 一次性解析, searchsorted 分桶
+    hours = pd.to_datetime(losers["created"], errors="coerce", utc=True,
+                           format="ISO8601").dt.hour.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(hours)
+    buckets = np.searchsorted(_PERIOD_EDGES, hours[valid], side="right")
+    per_counts = np.bincount(buckets, minlength=len(_PERIOD_LABELS))
+    per_sums = np.bincount(buckets, weights=r_arr[valid], minlength=len(_PERIOD_LABELS))
+    period_stats = {_PERIOD_LABELS[i]: {"count": int(per_counts[i]), "avg_r": float(per_sums[i] / per_counts[i])}
+                    for i in pd.unique(buckets)}
 
     # 识别模式
     patterns = []
@@ -113,19 +161,23 @@ def find_error_fingerprints(trades: list[dict]) -> dict:
 
 # ── 纪律评分 ─────────────────────────────────────────────────────
 
-def calc_discipline_score(trades: list[dict]) -> dict:
+def _truthy(col: pd.Series) -> pd.Series:
+    """数值列的真值掩码 (非空且非零)，等价于逐行 `if value`。"""
+    return col.notna() & (col != 0)
+
+
+def calc_discipline_score(df: pd.DataFrame) -> dict:
     """比较计划价与实际执行的偏差。"""
-    closed = [t for t in trades if t["status"] == "CLOSED"
-              and t["entry_price"] and t["actual_exit"] and t["profit_target"]]
-    if not closed:
+    mask = (df["is_closed"] & _truthy(df["entry_price"])
+            & _truthy(df["actual_exit"]) & _truthy(df["profit_target"]))
+    if not mask.any():
         return {"score": 100, "avg_deviation": 0, "details": []}
 
-    deviations = []
-    for t in closed:
-        dev = abs((t["deviation_pct"] or 0))
-        deviations.append({"ticker": t["ticker"], "deviation": dev})
+    dev = df.loc[mask, "deviation_pct"].fillna(0.0).abs()
+    deviations = [{"ticker": ticker, "deviation": d}
+                  for ticker, d in zip(df.loc[mask, "ticker"], dev.tolist())]
 
-    avg_dev = sum(d["deviation"] for d in deviations) / len(deviations)
+    avg_dev = float(dev.mean())
     score = max(0, 100 - avg_dev * 100)
 
     return {"score": score, "avg_deviation": avg_dev, "details": deviations}
@@ -133,80 +185,72 @@ def calc_discipline_score(trades: list[dict]) -> dict:
 
 # ── 深度分析 ─────────────────────────────────────────────────────
 
-def deep_analysis(trades: list[dict]) -> dict:
+def deep_analysis(df: pd.DataFrame) -> dict:
     """区分'市场对 vs 假设对'，识别执行力偏差。"""
-    closed = [t for t in trades if t["status"] == "CLOSED" and t["r_multiple"] is not None]
-    if not closed:
+    closed = df[df["is_scored"]]
+    if closed.empty:
         return {"market_vs_thesis": [], "execution_gaps": []}
 
+    r = closed["r_multiple"]
+    familiarity = closed["familiarity"]
+    deviation = closed["deviation_pct"].fillna(0.0)
+    lucky = ((r > 0) & _truthy(familiarity) & (familiarity <= 3)).tolist()
+    blind = ((r < 0) & _truthy(familiarity) & (familiarity >= 7)).tolist()
+    sloppy = (deviation > 0.05).tolist()
+
     analysis = []
-    for t in closed:
-        r = t["r_multiple"]
-        emotion = t.get("entry_emotion", "")
-        familiarity = t.get("familiarity", 5)
-        deviation = t.get("deviation_pct", 0) or 0
-
-        if r > 0 and familiarity and familiarity <= 3:
-            analysis.append(f"{t['ticker']}: 盈利但熟悉度低 ({familiarity}/10) — 可能是市场顺风而非假设正确")
-        elif r < 0 and familiarity and familiarity >= 7:
-            analysis.append(f"{t['ticker']}: 亏损但熟悉度高 ({familiarity}/10) — 假设可能有盲点")
-        if deviation > 0.05:
-            analysis.append(f"{t['ticker']}: 执行偏差 {deviation:.1%} — 纪律需加强")
+    for i, (ticker, fam, dev) in enumerate(zip(closed["ticker"], familiarity.tolist(), deviation.tolist())):
+        if lucky[i]:
+            analysis.append(f"{ticker}: 盈利但熟悉度低 ({fam:g}/10) — 可能是市场顺风而非假设正确")
+        elif blind[i]:
+            analysis.append(f"{ticker}: 亏损但熟悉度高 ({fam:g}/10) — 假设可能有盲点")
+        if sloppy[i]:
+            analysis.append(f"{ticker}: 执行偏差 {dev:.1%} — 纪律需加强")
 
     return {"insights": analysis}
 
 
 # ── 仓位分布分析 ─────────────────────────────────────────────────
 
-def calc_position_analysis(trades: list[dict]) -> dict:
+def _na_keys_to_none(frame: pd.DataFrame) -> pd.DataFrame:
+    """dropna=False 分组时缺失的键记为 None (与逐行 dict 分组的键一致)。"""
+    if frame.index.hasnans:
+        frame.index = pd.Index([None if pd.isna(k) else k for k in frame.index], dtype=object, name=frame.index.name)
+    return frame
+
+
+def calc_position_analysis(df: pd.DataFrame) -> dict:
     """分析仓位分布和个股收益。"""
     # 仓位分布 — 按标的聚合 (非 CLOSED 的持仓)
-    active_trades = [t for t in trades if t["status"] in ("PLANNED", "ACTIVE")]
-    by_ticker_pos = defaultdict(lambda: {"position_pct": 0, "status": "", "direction": ""})
-    for t in active_trades:
-        entry = by_ticker_pos[t["ticker"]]
-        entry["position_pct"] += t["position_pct"]
-        entry["status"] = t["status"]
-        entry["direction"] = t["direction"]
-
-    position_dist = [
-        {"ticker": k, "position_pct": v["position_pct"],
-         "status": v["status"], "direction": v["direction"]}
-        for k, v in by_ticker_pos.items()
-    ]
-    position_dist.sort(key=lambda x: x["position_pct"], reverse=True)
-
-    total_position = sum(p["position_pct"] for p in position_dist)
+    active = df[df["is_active"]]
+    by_ticker_pos = (
+        active.groupby("ticker", sort=False, dropna=False)
+        .agg(position_pct=("position_pct", "sum"), status=("status", "last"), direction=("direction", "last"))
+        .sort_values("position_pct", ascending=False, kind="stable")
+    )
+    by_ticker_pos = _na_keys_to_none(by_ticker_pos)
+    position_dist = by_ticker_pos.reset_index().to_dict("records")
+
+    total_position = float(by_ticker_pos["position_pct"].sum())
     # 集中度: 最大单标的占总仓位比例
     max_concentration = (position_dist[0]["position_pct"] / total_position * 100) if position_dist and total_position > 0 else 0
 
     # 个股收益统计 (仅已关闭)
-    closed = [t for t in trades if t["status"] == "CLOSED" and t["r_multiple"] is not None]
-    by_ticker = defaultdict(list)
-    for t in closed:
-        by_ticker[t["ticker"]].append(t)
-
-    ticker_stats = {}
-    for ticker, ticker_trades in by_ticker.items():
-        wins = [t for t in ticker_trades if t["r_multiple"] > 0]
-        r_vals = [t["r_multiple"] for t in ticker_trades]
-        returns = [t.get("actual_return_pct", 0) or 0 for t in ticker_trades]
-        ticker_stats[ticker] = {
-            "trades": len(ticker_trades),
-            "wins": len(wins),
-            "win_rate": len(wins) / len(ticker_trades),
-            "avg_r": sum(r_vals) / len(r_vals),
-            "total_r": sum(r_vals),
-            "avg_return": sum(returns) / len(returns),
-            "total_return": sum(returns),
-        }
+    closed = df[df["is_scored"]]
+    returns = closed["actual_return_pct"].fillna(0.0)
+    by_ticker = (
+        closed.assign(win=closed["r_multiple"] > 0, actual_return_pct=returns)
+        .groupby("ticker", sort=False, dropna=False)
+        .agg(trades=("r_multiple", "size"), wins=("win", "sum"),
+             avg_r=("r_multiple", "mean"), total_r=("r_multiple", "sum"),
+             avg_return=("actual_return_pct", "mean"), total_return=("actual_return_pct", "sum"))
+    )
+    by_ticker = _na_keys_to_none(by_ticker)
+    by_ticker.insert(2, "win_rate", by_ticker["wins"] / by_ticker["trades"])
+    ticker_stats = by_ticker.to_dict("index")
 
     # 总账户收益 (加权)
-    total_weighted_return = 0
-    for t in closed:
-        ret = t.get("actual_return_pct", 0) or 0
-        pos = t.get("position_pct", 0) or 0
-        total_weighted_return += ret * (pos / 100)
+    total_weighted_return = float((returns * (closed["position_pct"].fillna(0.0) / 100)).sum())
 
     return {
         "position_dist": position_dist,
@@ -219,18 +263,22 @@ def calc_position_analysis(trades: list[dict]) -> dict:
 
 # ── 风险偏好评分 ─────────────────────────────────────────────────
 
-def calc_risk_profile(trades: list[dict]) -> dict:
+def calc_risk_profile(df: pd.DataFrame) -> dict:
     """基于建仓参数分析风险偏好。
     评分 0-100: 0=极度保守, 50=均衡, 100=极度激进
     """
-    if not trades:
+    if df.empty:
         return {"score": 50, "label": "数据不足", "factors": []}
 
     factors = []
+    n_trades = len(df)
+    pos = df["position_pct"].to_numpy(dtype=np.float64)
+    rr = df["risk_reward"].to_numpy(dtype=np.float64)
+    wr = df["win_rate"].to_numpy(dtype=np.float64)
 
     # 1. 平均仓位 (权重 30%) — 仓位越大越激进
-    avg_pos = sum(t["position_pct"] for t in trades) / len(trades)
-    max_pos = max(t["position_pct"] for t in trades)
+    avg_pos = float(df["position_pct"].mean())
+    max_pos = float(df["position_pct"].max())
     # 仓位 2% 以下保守, 5% 中性, 10%+ 激进
     pos_score = min(100, max(0, (avg_pos - 1) / 14 * 100))
     factors.append({
@@ -242,9 +290,9 @@ def calc_risk_profile(trades: list[dict]) -> dict:
     })
 
     # 2. 平均盈亏比 (权重 25%) — 盈亏比越低越激进 (追求高频小利)
-    rr_values = [t["risk_reward"] for t in trades if t.get("risk_reward")]
-    if rr_values:
-        avg_rr = sum(rr_values) / len(rr_values)
+    rr_values = rr[(rr != 0) & ~np.isnan(rr)]
+    if rr_values.size:
+        avg_rr = float(rr_values.mean())
         # R/R < 1 激进, 2 中性, 4+ 保守
         rr_score = min(100, max(0, 100 - (avg_rr - 0.5) / 4 * 100))
         factors.append({
@@ -256,9 +304,9 @@ def calc_risk_profile(trades: list[dict]) -> dict:
         })
 
     # 3. 平均预期胜率 (权重 20%) — 低胜率+高赔率=激进; 高胜率+低赔率=保守
-    wr_values = [t["win_rate"] for t in trades if t.get("win_rate")]
-    if wr_values:
-        avg_wr = sum(wr_values) / len(wr_values)
+    wr_values = wr[(wr != 0) & ~np.isnan(wr)]
+    if wr_values.size:
+        avg_wr = float(wr_values.mean())
         # 胜率 < 40% 激进, 50% 中性, 70%+ 保守
         wr_score = min(100, max(0, 100 - (avg_wr - 0.2) / 0.6 * 100))
         factors.append({
@@ -270,17 +318,12 @@ def calc_risk_profile(trades: list[dict]) -> dict:
         })
 
     # 4. Kelly 利用率 (权重 15%) — 实际仓位 vs Kelly 建议
-    kelly_ratios = []
-    for t in trades:
-        wr = t.get("win_rate", 0)
-        rr = t.get("risk_reward", 0)
-        if wr and rr and wr > 0 and rr > 0:
-            kelly = (wr * rr - (1 - wr)) / rr
-            if kelly > 0:
-                actual_ratio = (t["position_pct"] / 100) / kelly
-                kelly_ratios.append(actual_ratio)
-    if kelly_ratios:
-        avg_kelly_ratio = sum(kelly_ratios) / len(kelly_ratios)
+    valid = (wr > 0) & (rr > 0)
+    kelly = np.divide(wr * rr - (1 - wr), rr, out=np.zeros_like(rr), where=valid)
+    valid &= kelly > 0
+    kelly_ratios = np.divide(pos / 100, kelly, out=np.zeros_like(pos), where=valid)[valid]
+    if kelly_ratios.size:
+        avg_kelly_ratio = float(kelly_ratios.mean())
         # < 0.3 保守, 0.5 中性 (半Kelly), 1.0+ 激进
         kelly_score = min(100, max(0, avg_kelly_ratio / 1.5 * 100))
         factors.append({
@@ -292,11 +335,11 @@ def calc_risk_profile(trades: list[dict]) -> dict:
         })
 
     # 5. 交易频率密度 (权重 10%) — 交易越频繁越激进
-    freq_score = min(100, max(0, len(trades) / 20 * 100))
+    freq_score = min(100, max(0, n_trades / 20 * 100))
     factors.append({
         "name": "交易频率",
-        "value": f"{len(trades)} 笔/月",
-        "detail": f"{'低频' if len(trades) <= 5 else '高频' if len(trades) >= 15 else '中频'}",
+        "value": f"{n_trades} 笔/月",
+        "detail": f"{'低频' if n_trades <= 5 else '高频' if n_trades >= 15 else '中频'}",
         "score": freq_score,
         "weight": 0.10,
     })
@@ -322,48 +365,82 @@ def calc_risk_profile(trades: list[dict]) -> dict:
 
 # ── 改进建议 ─────────────────────────────────────────────────────
 
-def generate_suggestions(fingerprints: dict, discipline: dict, risk_profile: dict | None = None) -> list[str]:
-    """基于错误指纹生成行动指令。"""
-    suggestions = []
+def generate_suggestions(fingerprints: dict, discipline: dict, risk_profile: dict | None = None) -> Iterator[str]:
+    """基于错误指纹逐条生成行动指令。"""
+    produced = False
 
     emotion_stats = fingerprints.get("by_emotion", {})
     if "fomo" in emotion_stats and emotion_stats["fomo"]["count"] >= 2:
-        suggestions.append("ACTION: 在 FOMO 状态下将仓位上限降至正常的 50%")
+        produced = True
+        yield "ACTION: 在 FOMO 状态下将仓位上限降至正常的 50%"
     if "fatigued" in emotion_stats and emotion_stats["fatigued"]["count"] >= 1:
-        suggestions.append("ACTION: 疲惫时禁止开仓，先休息再决策")
+        produced = True
+        yield "ACTION: 疲惫时禁止开仓，先休息再决策"
     if "fearful" in emotion_stats and emotion_stats["fearful"]["count"] >= 2:
-        suggestions.append("ACTION: 恐惧情绪下的交易亏损率高，建议暂停并重新评估假设")
+        produced = True
+        yield "ACTION: 恐惧情绪下的交易亏损率高，建议暂停并重新评估假设"
 
     period_stats = fingerprints.get("by_period", {})
     for period, stats in period_stats.items():
         if stats["count"] >= 2:
-            suggestions.append(f"ACTION: 减少在 {period} 时段的交易频率")
+            produced = True
+            yield f"ACTION: 减少在 {period} 时段的交易频率"
 
     if discipline.get("score", 100) < 80:
-        suggestions.append("ACTION: 纪律评分偏低，建议严格按计划执行，减少临时决策")
+        produced = True
+        yield "ACTION: 纪律评分偏低，建议严格按计划执行，减少临时决策"
 
     if risk_profile:
         score = risk_profile.get("score", 50)
         if score >= 75:
-            suggestions.append("ACTION: 风险偏好偏激进 — 建议降低平均仓位或提高胜率门槛")
+            produced = True
+            yield "ACTION: 风险偏好偏激进 — 建议降低平均仓位或提高胜率门槛"
         elif score <= 25:
-            suggestions.append("INFO: 风险偏好偏保守 — 可适当提高盈亏比要求以匹配保守风格")
+            produced = True
+            yield "INFO: 风险偏好偏保守 — 可适当提高盈亏比要求以匹配保守风格"
+
+    if not produced:
+        yield "本月表现稳定，继续保持当前纪律。"
+
+
+# ── 分析汇总 ─────────────────────────────────────────────────────
+
+_ANALYSES = (
+    ("statistics", calc_statistics),
+    ("highlights", find_highlights),
+    ("fingerprints", find_error_fingerprints),
+    ("discipline", calc_discipline_score),
+    ("deep_analysis", deep_analysis),
+    ("position_analysis", calc_position_analysis),
+    ("risk_profile", calc_risk_profile),
+)
 
-    if not suggestions:
-        suggestions.append("本月表现稳定，继续保持当前纪律。")
 
-    return suggestions
+def run_analyses(df: pd.DataFrame) -> dict:
+    """依次执行各项分析。数据量只有数百行, 建线程的开销高于聚合本身, 且并发读同一个 DataFrame 不保证安全, 故不并行。"""
+    return {name: fn(df) for name, fn in _ANALYSES}
 
 
 # ── Plotly HTML 报告 ─────────────────────────────────────────────
 
-def render_html_report(review: dict, output_path: str) -> str:
-    """生成 Plotly 交互式 HTML 报告。"""
-    stats = review["statistics"]
-    fingerprints = review["fingerprints"]
-    position_analysis = review.get("position_analysis", {})
-    risk_profile = review.get("risk_profile", {})
+# 报告主题: 在 plotly_dark 基础上固定背景色, 导入时注册一次
+_REPORT_THEME = go.layout.Template(pio.templates["plotly_dark"])
+_REPORT_THEME.layout.paper_bgcolor = "#1a1a2e"
+_REPORT_THEME.layout.plot_bgcolor = "#16213e"
+pio.templates["reflexive_dark"] = _REPORT_THEME
+
+
+@functools.lru_cache(maxsize=32)
+def _ensure_dir(p: str) -> Path:
+    """创建目录 (每个路径只在进程内检查一次)。"""
+    path = Path(p)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
 
+
+@functools.lru_cache(maxsize=1)
+def _report_template() -> go.Figure:
+    """报告图表骨架 (子图布局 + 样式)，只构建一次；每次渲染复制后填充数据。"""
     fig = make_subplots(
         rows=5, cols=2,
         subplot_titles=(
@@ -384,6 +461,24 @@ def render_html_report(review: dict, output_path: str) -> str:
         horizontal_spacing=0.1,
     )
 
+    # 样式
+    fig.update_layout(
+        template="reflexive_dark",
+        height=2000,
+        showlegend=False,
+    )
+    return fig
+
+
+def render_html_report(review: dict, output_path: str | None = None, include_plotlyjs: bool | str = "cdn") -> str:
+    """生成 Plotly 交互式 HTML 报告并返回 HTML 字符串；传入 output_path 时同时写入文件。"""
+    stats = review["statistics"]
+    fingerprints = review["fingerprints"]
+    position_analysis = review.get("position_analysis", {})
+    risk_profile = review.get("risk_profile", {})
+
+    fig = go.Figure(_report_template())
+
     r_values = stats.get("r_values", [])
 
     # 1. R-Multiple 分布直方图
@@ -399,11 +494,11 @@ def render_html_report(review: dict, output_path: str) -> str:
                                  line=dict(color="#00BCD4", width=2)), row=1, col=2)
 
     # 3. 情绪-收益散点图
-    trades = review.get("trades", [])
-    closed = [t for t in trades if t["status"] == "CLOSED" and t["r_multiple"] is not None]
-    if closed:
-        emotions = [t.get("entry_emotion", "unknown") for t in closed]
-        r_vals = [t["r_multiple"] for t in closed]
+    df = review["trades"]
+    closed = df[df["is_scored"]]
+    if not closed.empty:
+        emotions = closed["entry_emotion"].tolist()
+        r_vals = closed["r_multiple"].tolist()
         scatter_colors = ["#00C853" if r > 0 else "#FF1744" for r in r_vals]
         fig.add_trace(go.Scatter(
             x=emotions, y=r_vals, mode="markers",
@@ -482,19 +577,16 @@ def render_html_report(review: dict, output_path: str) -> str:
             marker_color="#FF9800", name="Loss by Period",
         ), row=5, col=1)
 
-    # 样式
     fig.update_layout(
         title=dict(text=f"ReflexiveTrader Pro — Monthly Review ({review['period']})", font=dict(size=20)),
-        template="plotly_dark",
-        height=2000,
-        showlegend=False,
-        paper_bgcolor="#1a1a2e",
-        plot_bgcolor="#16213e",
     )
 
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    fig.write_html(output_path)
-    return output_path
+    # plotly.js 默认走 CDN, 离线环境 (reports.offline) 才内联 ~3MB 脚本
+    html = fig.to_html(include_plotlyjs=include_plotlyjs, full_html=True, config={"displaylogo": False})
+    if output_path:
+        _ensure_dir(str(Path(output_path).parent))
+        Path(output_path).write_text(html, encoding="utf-8")
+    return html
 
 
 # ── 终端摘要 ─────────────────────────────────────────────────────
@@ -515,12 +607,12 @@ def print_terminal_summary(review: dict) -> None:
 
     table.add_row("Total Trades", str(stats["total"]))
     table.add_row("Closed", str(stats.get("closed", 0)))
-    table.add_row("Win Rate", fmt_pct(stats.get("win_rate", 0) * 100))
-    table.add_row("Avg R", fmt_r(stats.get("avg_r", 0)))
-    table.add_row("Best R", fmt_r(stats.get("best_r", 0)))
-    table.add_row("Worst R", fmt_r(stats.get("worst_r", 0)))
-    table.add_row("Total R", fmt_r(stats.get("total_r", 0)))
-    table.add_row("Max Drawdown", fmt_r(stats.get("max_drawdown", 0)))
+    table.add_row("Win Rate", fmt_pct_text(stats.get("win_rate", 0) * 100))
+    table.add_row("Avg R", fmt_r_text(stats.get("avg_r", 0)))
+    table.add_row("Best R", fmt_r_text(stats.get("best_r", 0)))
+    table.add_row("Worst R", fmt_r_text(stats.get("worst_r", 0)))
+    table.add_row("Total R", fmt_r_text(stats.get("total_r", 0)))
+    table.add_row("Max Drawdown", fmt_r_text(stats.get("max_drawdown", 0)))
     table.add_row("Discipline", f"{discipline.get('score', 100):.0f}/100")
     console.print(table)
 
@@ -528,7 +620,7 @@ def print_terminal_summary(review: dict) -> None:
     if highlights:
         console.print(Panel("[title]HIGHLIGHTS[/title]", style="green"))
         for h in highlights:
-            console.print(f"  [profit]{h['ticker']}[/profit] {fmt_r(h['r_multiple'])} | {h.get('entry_emotion', '')} | {h.get('thesis', '')[:60]}")
+            console.print(f"  [profit]{h.ticker}[/profit] {fmt_r(h.r_multiple)} | {h.entry_emotion} | {h.thesis[:60]}")
 
     # 错误指纹
     if fingerprints["patterns"]:
@@ -543,42 +635,59 @@ def print_terminal_summary(review: dict) -> None:
             console.print(f"  [warn]{insight}[/warn]")
 
     # 建议
-    console.print(Panel("[title]ACTION ITEMS[/title]", style="cyan"))
-    for s in suggestions:
-        console.print(f"  [accent]{s}[/accent]")
+    console.print(Panel("\n".join(f"[accent]{s}[/accent]" for s in suggestions),
+                        title="[title]ACTION ITEMS[/title]", style="cyan"))
+
+
+# ── 交易缓存 ─────────────────────────────────────────────────────
+
+# 本地写操作会清除对应月份的缓存；Notion 网页端的修改感知不到，靠 TTL 兜底
+_TRADE_CACHE_TTL = 24 * 3600
+
+
+def _cached_trades(period: str, date_range: tuple[str, str], refresh: bool = False) -> list[dict]:
+    """拉取某月交易记录。已结束且全部 CLOSED 的月份落盘缓存 (TTL 一天) 以跳过 Notion 请求；refresh=True 时强制重新拉取。"""
+    path = trade_cache_path(period)
+    is_past = period < date.today().strftime("%Y-%m")
+
+    if is_past and not refresh:
+        try:
+            if time.time() - path.stat().st_mtime < _TRADE_CACHE_TTL:
+                return json.loads(path.read_text(encoding="utf-8"))
+        except OSError:
+            pass  # 无缓存文件
+
+    trades = fetch_all_trades(date_range=date_range)
+    if is_past and trades and all(t["status"] == "CLOSED" for t in trades):
+        try:
+            _ensure_dir(str(path.parent))
+            path.write_text(json.dumps(trades, ensure_ascii=False), encoding="utf-8")
+        except OSError:
+            pass  # 只读环境 (云端) 跳过缓存
+    return trades
 
 
 # ── 主函数 ───────────────────────────────────────────────────────
 
-def generate_monthly_review(year: int, month: int) -> dict:
-    """生成月度复盘报告。"""
-    _, last_day = calendar.monthrange(year, month)
-    start = f"{year}-{month:02d}-01T00:00:00Z"
-    end = f"{year}-{month:02d}-{last_day}T23:59:59Z"
-    period = f"{year}-{month:02d}"
+def generate_monthly_review(year: int, month: int, refresh: bool = False) -> dict:
+    """生成月度复盘报告。refresh=True 时跳过本地交易缓存。"""
+    start, end, period = month_bounds(year, month)
 
     console.print(f"[muted]正在从 Notion 拉取 {period} 的交易记录...[/muted]")
-    trades = fetch_all_trades(date_range=(start, end))
+    trades = _cached_trades(period, (start, end), refresh=refresh)
 
     if not trades:
         console.print("[warn]该月无交易记录。[/warn]")
         return {"period": period, "trades": [], "statistics": {"total": 0}}
 
-    stats = calc_statistics(trades)
-    highlights = find_highlights(trades)
-    fingerprints = find_error_fingerprints(trades)
-    discipline = calc_discipline_score(trades)
-    deep = deep_analysis(trades)
-    suggestions = generate_suggestions(fingerprints, discipline)
+    df = build_trade_frame(trades)
+    results = run_analyses(df)
+    suggestions = list(generate_suggestions(results["fingerprints"], results["discipline"], results["risk_profile"]))
 
     review = {
         "period": period,
-        "trades": trades,
-        "statistics": stats,
-        "highlights": highlights,
-        "fingerprints": fingerprints,
-        "discipline": discipline,
-        "deep_analysis": deep,
+        "trades": df,
+        **results,
         "suggestions": suggestions,
     }
 
@@ -587,9 +696,10 @@ def generate_monthly_review(year: int, month: int) -> dict:
 
     # HTML 报告
     cfg = load_config()
-    output_dir = cfg.get("reports", {}).get("output_dir", "./reports")
+    reports_cfg = cfg.get("reports", {})
+    output_dir = reports_cfg.get("output_dir", "./reports")
     output_path = f"{output_dir}/{period}_review.html"
-    render_html_report(review, output_path)
+    render_html_report(review, output_path, include_plotlyjs=True if reports_cfg.get("offline") else "cdn")
     console.print(f"\n[profit]HTML 报告已生成: {output_path}[/profit]")
 
     return review
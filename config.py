@@ -1,5 +1,6 @@
 """ReflexiveTrader Pro — 配置管理"""
 
+import functools
 import os
 import tempfile
 from pathlib import Path
@@ -12,7 +13,15 @@ CONFIG_PATH = Path(__file__).parent / "config.yaml"
 _IS_CLOUD = not CONFIG_PATH.exists()
 
 
-def load_config() -> dict:
+def _config_mtime() -> float:
+    try:
+        return CONFIG_PATH.stat().st_mtime
+    except OSError:
+        return 0.0  # 云端无配置文件 (Secrets 不变)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config(mtime: float) -> dict:
     # 优先从 Streamlit Secrets 读取 (云端部署)
     try:
         import streamlit as st
@@ -35,15 +44,24 @@ def load_config() -> dict:
     # 本地: 从 config.yaml 读取
     if not CONFIG_PATH.exists():
         raise FileNotFoundError(f"配置文件不存在: {CONFIG_PATH}")
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    return yaml.safe_load(CONFIG_PATH.read_text(encoding="utf-8"))
+
+
+def load_config() -> dict:
+    """读取配置 (按 config.yaml 的 mtime 缓存, 文件被外部修改后自动重新加载)。"""
+    return _load_config(_config_mtime())
+
+
+def clear_config_cache() -> None:
+    """清空配置缓存 (Secrets 变更等 mtime 感知不到的情况需手动调用)。"""
+    _load_config.cache_clear()
 
 
 def save_config(cfg: dict) -> None:
     if _IS_CLOUD:
         return  # 云端只读，跳过写入
-    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-        yaml.dump(cfg, f, default_flow_style=False, allow_unicode=True)
+    CONFIG_PATH.write_text(yaml.dump(cfg, default_flow_style=False, allow_unicode=True), encoding="utf-8")
+    clear_config_cache()
 
 
 def get_notion_api_key(cfg: dict) -> str:
@@ -1,15 +1,22 @@
 """生成 PWA 配置的 HTML 片段（带 base64 图标）"""
 import base64
+import functools
+from pathlib import Path
+
+ICON_DIR = Path(__file__).parent
+
 
 def get_icon_base64(filename):
-    with open(filename, "rb") as f:
-        return base64.b64encode(f.read()).decode()
+    return base64.b64encode((ICON_DIR / filename).read_bytes()).decode()
+
 
-# 读取 Apple icon
-apple_icon_180 = get_icon_base64("apple-touch-icon.png")
+@functools.cache
+def build_pwa_html():
+    # 读取 Apple icon (首次访问 PWA_HTML 时才读取并编码)
+    apple_icon_180 = get_icon_base64("apple-touch-icon.png")
 
-# 生成 HTML
-PWA_HTML = f"""
+    # 生成 HTML
+    return f"""
 <link rel="manifest" href="./manifest.json">
 <meta name="theme-color" content="#00bcd4">
 <meta name="apple-mobile-web-app-capable" content="yes">
@@ -20,6 +27,15 @@ PWA_HTML = f"""
 <link rel="shortcut icon" href="./favicon.ico">
 """
 
+
+def __getattr__(name):
+    # PEP 562: PWA_HTML 惰性生成, 仅导入模块不会读盘
+    if name == "PWA_HTML":
+        return build_pwa_html()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == "__main__":
-    print(PWA_HTML[:500])
-    print(f"\n... (total length: {len(PWA_HTML)} chars)")
+    html = build_pwa_html()
+    print(html[:500])
+    print(f"\n... (total length: {len(html)} chars)")
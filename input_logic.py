@@ -23,12 +23,15 @@ else:
 
 import sys
 import os
-import calendar
-import tempfile
+import html
 from datetime import date, timedelta
 from pathlib import Path
+from types import MappingProxyType
 
+import pandas as pd
 import streamlit as st
+from notion_client import Client
+from streamlit.connections import BaseConnection
 
 # ── 页面配置（必须在最前面，只能调用一次）──────────────────────
 
@@ -51,6 +54,13 @@ else:
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+from analytics_engine import (
+    build_trade_frame,
+    generate_suggestions,
+    render_html_report,
+    run_analyses,
+)
+from config import clear_config_cache, get_notion_api_key, load_config
 from models import (
     EXTREME_EMOTIONS,
     InvalidationPlan,
@@ -59,7 +69,109 @@ from models import (
     TradeHypothesis,
     TradePlan,
 )
-from utils import kelly_criterion
+from notion_bridge import (
+    add_psych_note,
+    build_client,
+    close_trade,
+    ensure_database,
+    fetch_all_trades,
+    sync_trade_plan,
+    update_trade,
+    update_trade_status,
+)
+from utils import kelly_criterion, month_bounds
+
+# ── 选项常量 ─────────────────────────────────────────────────────
+
+DIRECTION_OPTIONS = MappingProxyType({
+    "LONG": "🟢 做多",
+    "SHORT": "🔴 做空",
+})
+EMOTION_OPTIONS = MappingProxyType({
+    "calm": "😌 冷静", "confident": "💪 自信", "exploratory": "🔍 尝试",
+    "fearful": "😰 恐惧", "fomo": "🔥 FOMO", "fatigued": "😴 疲惫",
+})
+STATUS_EMOJI = MappingProxyType({"PLANNED": "⏳", "ACTIVE": "🟢", "CLOSED": "✅"})
+
+
+# ── 数据缓存 ─────────────────────────────────────────────────────
+
+@st.cache_resource(show_spinner=False)
+def _cfg() -> dict:
+    """配置只解析一次，跨 rerun 复用；修改配置后调用 _cfg.clear()。"""
+    return load_config()
+
+
+class NotionConnection(BaseConnection[Client]):
+    """Notion 连接: st.connection 负责缓存，底层 httpx 连接池跨 rerun / 会话复用。"""
+
+    def _connect(self, api_key: str, **kwargs) -> Client:
+        return build_client(api_key)
+
+    @property
+    def client(self) -> Client:
+        return self._instance
+
+
+def get_notion():
+    """Notion client 与 database_id；client 由 st.connection 缓存 (跨 rerun / 会话复用连接池)。"""
+    cfg = _cfg()
+    # 以 api_key 作为连接参数: 重新加载配置后 key 变化会自动建立新连接
+    conn = st.connection("notion", type=NotionConnection, api_key=get_notion_api_key(cfg))
+    return ensure_database(cfg, client=conn.client)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_fetch(status: str | None = None, date_range: tuple[str, str] | None = None) -> list[dict]:
+    """拉取交易记录 (60s 内的重复 rerun 复用结果；写入 Notion 后调用 _invalidate_trades())。"""
+    client, db_id = get_notion()
+    return fetch_all_trades(status=status, date_range=date_range, client=client, db_id=db_id)
+
+
+def _review_data(year: int, month: int) -> dict | None:
+    """拉取某月交易并完成全部分析与 HTML 渲染。"""
+    start, end, period = month_bounds(year, month)
+
+    trades = _cached_fetch(date_range=(start, end))
+    if not trades:
+        return None
+
+    df = build_trade_frame(trades)
+    results = run_analyses(df)
+    review_data = {
+        "period": period, "trades": df, **results,
+        "suggestions": list(generate_suggestions(results["fingerprints"], results["discipline"],
+                                                 results["risk_profile"])),
+    }
+
+    # HTML 直接在内存中生成并嵌入页面, 不落盘
+    offline = _cfg().get("reports", {}).get("offline", False)
+    review_data["html"] = render_html_report(review_data, include_plotlyjs=True if offline else "cdn")
+    return review_data
+
+
+@st.cache_data(ttl=3600, show_spinner="正在生成复盘...")
+def _review_past_month(year: int, month: int) -> dict | None:
+    return _review_data(year, month)
+
+
+@st.cache_data(ttl=60, show_spinner="正在生成复盘...")
+def _review_current_month(year: int, month: int) -> dict | None:
+    return _review_data(year, month)
+
+
+def build_review(year: int, month: int) -> dict | None:
+    """已结束的月份缓存一小时；当月仍可能有 CLI / Notion 端写入，与 _cached_fetch 一样只缓存 60s。"""
+    today = date.today()
+    ended = (year, month) < (today.year, today.month)
+    return (_review_past_month if ended else _review_current_month)(year, month)
+
+
+def _invalidate_trades() -> None:
+    """Notion 写入后清除交易相关缓存。"""
+    _cached_fetch.clear()
+    _review_past_month.clear()
+    _review_current_month.clear()
 
 # ── 自定义样式 ───────────────────────────────────────────────────
 
@@ -94,6 +206,10 @@ st.markdown("""
 
 page = st.sidebar.radio("导航", ["📝 新建交易计划", "📋 管理持仓", "📊 月度复盘"], index=0)
 
+if st.sidebar.button("重新加载配置"):
+    clear_config_cache()
+    _cfg.clear()
+
 st.markdown("# REFLEXIVE TRADER PRO")
 st.markdown(
     '<p style="text-align:center;color:#607d8b;">'
@@ -107,135 +223,143 @@ st.markdown(
 # =====================================================================
 if page == "📝 新建交易计划":
     st.divider()
-    st.markdown("## 1. 核心假设")
-
-    col1, col2 = st.columns([2, 1])
-    with col1:
-        ticker = st.text_input("标的代码", placeholder="AAPL").upper().strip()
-    with col2:
-        DIRECTION_OPTIONS = {
-            "LONG": "🟢 做多",
-            "SHORT": "🔴 做空",
-        }
-        direction = st.selectbox(
-            "方向",
-            options=list(DIRECTION_OPTIONS.keys()),
-            format_func=lambda x: DIRECTION_OPTIONS[x],
-        )
-
-    thesis = st.text_area("投资逻辑 (核心假设)", placeholder="描述你的建仓逻辑...", height=100)
-
-    col_k, col_u, col_p = st.columns(3)
-    with col_k:
-        known_factors = st.text_area("你知道什么", placeholder="已确认的信息...", height=80)
-    with col_u:
-        unknown_factors = st.text_area("你不知道什么", placeholder="不确定的因素...", height=80)
-    with col_p:
-        priced_in = st.text_area("是否已 Price In", placeholder="市场是否已反映...", height=80)
-
-    familiarity = st.slider("熟悉度评分", 1, 10, 5, help="1=完全不了解, 10=深度研究")
-    if familiarity <= 3:
-        st.warning("⚠️ 熟悉度较低 — 建议缩小仓位或进一步研究")
-
-    technical_confirmed = st.checkbox("✅ 已确认技术面 (操作前是否看过技术图？)", value=False)
-    if not technical_confirmed:
-        st.info("💡 建议在操作前确认技术面走势，避免逆势交易")
-
-    st.divider()
-    st.markdown("## 2. 失效点与盈利目标")
+    # 输入项放在表单里: 编辑过程中不触发 rerun, 点击"更新预览"或提交按钮时统一提交
+    with st.form("trade_plan_form", clear_on_submit=False):
+        st.markdown("## 1. 核心假设")
+
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            ticker = st.text_input("标的代码", placeholder="AAPL").upper().strip()
+        with col2:
+            direction = st.selectbox(
+                "方向",
+                options=list(DIRECTION_OPTIONS.keys()),
+                format_func=lambda x: DIRECTION_OPTIONS[x],
+            )
+
+        thesis = st.text_area("投资逻辑 (核心假设)", placeholder="描述你的建仓逻辑...", height=100)
+
+        col_k, col_u, col_p = st.columns(3)
+        with col_k:
+            known_factors = st.text_area("你知道什么", placeholder="已确认的信息...", height=80)
+        with col_u:
+            unknown_factors = st.text_area("你不知道什么", placeholder="不确定的因素...", height=80)
+        with col_p:
+            priced_in = st.text_area("是否已 Price In", placeholder="市场是否已反映...", height=80)
+
+        familiarity = st.slider("熟悉度评分", 1, 10, 5, help="1=完全不了解, 10=深度研究")
+        if familiarity <= 3:
+            st.warning("⚠️ 熟悉度较低 — 建议缩小仓位或进一步研究")
+
+        technical_confirmed = st.checkbox("✅ 已确认技术面 (操作前是否看过技术图？)", value=False)
+        if not technical_confirmed:
+            st.info("💡 建议在操作前确认技术面走势，避免逆势交易")
+
+        st.divider()
+        st.markdown("## 2. 失效点与盈利目标")
 # ── PLACEHOLDER_STEP2 ──
 
-    col_e, col_s = st.columns(2)
-    with col_e:
-        entry_price = st.number_input("计划入场价", min_value=0.01, value=100.0, step=0.01, format="%.2f")
-    with col_s:
-        price_stop = st.number_input("价格止损", min_value=0.01, value=90.0, step=0.01, format="%.2f")
+        col_e, col_s = st.columns(2)
+        with col_e:
+            entry_price = st.number_input("计划入场价", min_value=0.01, value=100.0, step=0.01, format="%.2f")
+        with col_s:
+            price_stop = st.number_input("价格止损", min_value=0.01, value=90.0, step=0.01, format="%.2f")
 
-    col_t1, col_t2 = st.columns(2)
-    with col_t1:
-        profit_target_1 = st.number_input("第一盈利目标", min_value=0.01, value=120.0, step=0.01, format="%.2f")
-    with col_t2:
-        profit_target_2 = st.number_input("第二盈利目标 (加仓点)", min_value=0.0, value=0.0, step=0.01, format="%.2f")
+        col_t1, col_t2 = st.columns(2)
+        with col_t1:
+            profit_target_1 = st.number_input("第一盈利目标", min_value=0.01, value=120.0, step=0.01, format="%.2f")
+        with col_t2:
+            profit_target_2 = st.number_input("第二盈利目标 (加仓点)", min_value=0.0, value=0.0, step=0.01, format="%.2f")
 
-    col_ts, col_act = st.columns(2)
-    with col_ts:
-        time_stop = st.date_input("时间止损", value=date.today() + timedelta(days=30))
-    with col_act:
-        action_at_target = st.selectbox("达到目标后操作", ["TAKE_PROFIT", "PYRAMID", "HOLD"])
+        col_ts, col_act = st.columns(2)
+        with col_ts:
+            time_stop = st.date_input("时间止损", value=date.today() + timedelta(days=30))
+        with col_act:
+            action_at_target = st.selectbox("达到目标后操作", ["TAKE_PROFIT", "PYRAMID", "HOLD"])
 
-    logic_stop = st.text_input("逻辑止损 (什么情况下假设失效？)", placeholder="例: 财报不及预期 / 管理层变动...")
+        logic_stop = st.text_input("逻辑止损 (什么情况下假设失效？)", placeholder="例: 财报不及预期 / 管理层变动...")
 
-    st.divider()
-    st.markdown("## 3. 心理状态自评")
+        st.divider()
+        st.markdown("## 3. 心理状态自评")
 
-    EMOTION_OPTIONS = {
-        "calm": "😌 冷静", "confident": "💪 自信", "exploratory": "🔍 尝试",
-        "fearful": "😰 恐惧", "fomo": "🔥 FOMO", "fatigued": "😴 疲惫",
-    }
-    emotion = st.selectbox("当前情绪状态", options=list(EMOTION_OPTIONS.keys()),
-                           format_func=lambda x: EMOTION_OPTIONS[x], index=0)
+        emotion = st.selectbox("当前情绪状态", options=list(EMOTION_OPTIONS.keys()),
+                               format_func=lambda x: EMOTION_OPTIONS[x], index=0)
 
-    is_extreme = emotion in EXTREME_EMOTIONS
-    if is_extreme:
-        st.error(f"🚨 **EXTREME EMOTION DETECTED**\n\n当前情绪: **{EMOTION_OPTIONS[emotion]}**\n\n建议暂停 15 分钟后重新评估。")
+        is_extreme = emotion in EXTREME_EMOTIONS
+        if is_extreme:
+            st.error(f"🚨 **EXTREME EMOTION DETECTED**\n\n当前情绪: **{EMOTION_OPTIONS[emotion]}**\n\n建议暂停 15 分钟后重新评估。")
 
-    psych_note = st.text_input("补充说明 (可选)", placeholder="当前心理状态的额外备注...")
+        psych_note = st.text_input("补充说明 (可选)", placeholder="当前心理状态的额外备注...")
 
-    st.divider()
-    st.markdown("## 4. 仓位与盈亏比")
+        st.divider()
+        st.markdown("## 4. 仓位与盈亏比")
 # ── PLACEHOLDER_STEP4 ──
 
-    col_w, col_rr = st.columns(2)
-    with col_w:
-        win_rate_pct = st.slider("预期胜率", 5, 95, 50, 5, format="%d%%",
-                                  help="你认为这笔交易盈利的概率")
-        win_rate = win_rate_pct / 100
-    with col_rr:
-        risk_reward = st.number_input("盈亏比 (盈利/亏损)", min_value=0.1, value=2.0, step=0.1, format="%.1f")
-
-    kelly = kelly_criterion(win_rate, risk_reward)
-    risk_per_share = abs(entry_price - price_stop)
-
-    col_info1, col_info2, col_info3 = st.columns(3)
-    with col_info1:
-        st.metric("Kelly 建议仓位", f"{kelly:.1%}")
-    with col_info2:
-        st.metric("半 Kelly", f"{kelly/2:.1%}")
-    with col_info3:
-        st.metric("每股风险", f"${risk_per_share:.2f}")
-
-    position_pct = st.number_input("实际仓位 (占总资金 %)", min_value=0.1, max_value=100.0,
-                                   value=min(max(round(kelly * 50, 1), 0.1), 100.0), step=0.5, format="%.1f")
+        col_w, col_rr = st.columns(2)
+        with col_w:
+            win_rate_pct = st.slider("预期胜率", 5, 95, 50, 5, format="%d%%",
+                                      help="你认为这笔交易盈利的概率")
+            win_rate = win_rate_pct / 100
+        with col_rr:
+            risk_reward = st.number_input("盈亏比 (盈利/亏损)", min_value=0.1, value=2.0, step=0.1, format="%.1f")
+
+        kelly = kelly_criterion(round(win_rate, 4), round(risk_reward, 4))
+        risk_per_share = abs(entry_price - price_stop)
+
+        col_info1, col_info2, col_info3 = st.columns(3)
+        with col_info1:
+            st.metric("Kelly 建议仓位", f"{kelly:.1%}")
+        with col_info2:
+            st.metric("半 Kelly", f"{kelly/2:.1%}")
+        with col_info3:
+            st.metric("每股风险", f"${risk_per_share:.2f}")
+
+        # 默认值 (半 Kelly) 只在首次渲染时写入 session_state, 之后保留用户的修改
+        st.session_state.setdefault("position_pct", min(max(round(kelly * 50, 1), 0.1), 100.0))
+        position_pct = st.number_input("实际仓位 (占总资金 %)", min_value=0.1, max_value=100.0,
+                                       step=0.5, format="%.1f", key="position_pct")
+
+        # 情绪在表单内修改时不会 rerun, 因此确认框依据上次提交的情绪显示; 提交时再统一校验
+        confirm_extreme = (st.checkbox("I confirm to proceed under extreme emotion", value=False)
+                           if is_extreme else False)
+
+        col_preview, col_submit = st.columns(2)
+        with col_preview:
+            st.form_submit_button("更新预览", use_container_width=True)
+        with col_submit:
+            submitted = st.form_submit_button("提交交易计划并同步到 Notion", type="primary",
+                                              use_container_width=True)
 
     st.divider()
     st.markdown("## 交易计划摘要")
 
     if ticker:
-        summary_data = {
-            "标的": f"{ticker} ({DIRECTION_OPTIONS[direction]})",
-            "技术面": "✅ 已确认" if technical_confirmed else "❌ 未确认",
-            "入场价": f"${entry_price:.2f}", "止损": f"${price_stop:.2f}",
-            "目标1": f"${profit_target_1:.2f}",
-            "目标2": f"${profit_target_2:.2f}" if profit_target_2 else "N/A",
-            "时间止损": str(time_stop), "情绪": EMOTION_OPTIONS[emotion],
-            "胜率": f"{win_rate:.0%}", "盈亏比": f"{risk_reward:.1f}", "仓位": f"{position_pct:.1f}%",
-        }
-        cols = st.columns(4)
-        for i, (k, v) in enumerate(summary_data.items()):
-            with cols[i % 4]:
-                st.markdown(f"**{k}**<br>{v}", unsafe_allow_html=True)
-
-    st.divider()
-
-    can_submit = bool(ticker and thesis and entry_price > 0 and price_stop > 0)
-    if is_extreme:
-        confirm_extreme = st.checkbox("I confirm to proceed under extreme emotion", value=False)
-        can_submit = can_submit and confirm_extreme
-
-    submitted = st.button("提交交易计划并同步到 Notion", type="primary",
-                          disabled=not can_submit, use_container_width=True)
-
-    if submitted:
+        # 摘要只依赖这组输入；未变化时直接复用上次拼好的 HTML (其他文本框输入不触发重建)
+        sig = (ticker, direction, entry_price, price_stop, profit_target_1, profit_target_2,
+               time_stop, emotion, win_rate, risk_reward, position_pct, technical_confirmed)
+        if st.session_state.get("_summary_sig") != sig or "_summary_html" not in st.session_state:
+            summary_data = {
+                "标的": f"{ticker} ({DIRECTION_OPTIONS[direction]})",
+                "技术面": "✅ 已确认" if technical_confirmed else "❌ 未确认",
+                "入场价": f"${entry_price:.2f}", "止损": f"${price_stop:.2f}",
+                "目标1": f"${profit_target_1:.2f}",
+                "目标2": f"${profit_target_2:.2f}" if profit_target_2 else "N/A",
+                "时间止损": str(time_stop), "情绪": EMOTION_OPTIONS[emotion],
+                "胜率": f"{win_rate:.0%}", "盈亏比": f"{risk_reward:.1f}", "仓位": f"{position_pct:.1f}%",
+            }
+            # 四列网格一次性渲染 (单个元素, 而非每项一条 markdown)
+            cells = "".join(f"<div><b>{html.escape(k)}</b><br>{html.escape(v)}</div>" for k, v in summary_data.items())
+            st.session_state["_summary_html"] = (
+                f'<div style="display:grid;grid-template-columns:repeat(4,1fr);gap:0.8rem 1rem;">{cells}</div>'
+            )
+            st.session_state["_summary_sig"] = sig
+        st.markdown(st.session_state["_summary_html"], unsafe_allow_html=True)
+
+    if submitted and not (ticker and thesis):
+        st.error("请填写标的代码和投资逻辑后再提交")
+    elif submitted and is_extreme and not confirm_extreme:
+        st.error("当前处于极端情绪，请勾选确认后再提交")
+    elif submitted:
         hypothesis = TradeHypothesis(ticker=ticker, direction=direction, thesis=thesis,
             familiarity_score=familiarity, known_factors=known_factors,
             unknown_factors=unknown_factors, priced_in=priced_in, technical_confirmed=technical_confirmed)
@@ -248,8 +372,8 @@ if page == "📝 新建交易计划":
         plan = TradePlan(hypothesis=hypothesis, invalidation=invalidation,
             psychology=psychology, position=position)
         try:
-            from notion_bridge import sync_trade_plan
-            page_id = sync_trade_plan(plan)
+            page_id = sync_trade_plan(plan, client=get_notion()[0])
+            _invalidate_trades()
             st.success(f"Done! Synced to Notion (page: {page_id[:8]}...)")
             st.balloons()
         except Exception as e:
@@ -262,189 +386,198 @@ elif page == "📋 管理持仓":
     st.divider()
     st.markdown("## 持仓管理")
 
-    from notion_bridge import fetch_all_trades, close_trade, update_trade_status, add_psych_note
-
-    STATUS_FILTER = st.selectbox("筛选状态", ["ALL", "PLANNED", "ACTIVE", "CLOSED"], index=0)
+    col_filter, col_refresh = st.columns([4, 1])
+    with col_filter:
+        STATUS_FILTER = st.selectbox("筛选状态", ["ALL", "PLANNED", "ACTIVE", "CLOSED"], index=0)
+    with col_refresh:
+        if st.button("🔄 刷新", use_container_width=True):
+            _invalidate_trades()
+            st.rerun()
 
     try:
         with st.spinner("正在从 Notion 拉取交易记录..."):
-            if STATUS_FILTER == "ALL":
-                trades = fetch_all_trades()
-            else:
-                trades = fetch_all_trades(status=STATUS_FILTER)
+            trades = _cached_fetch(STATUS_FILTER if STATUS_FILTER != "ALL" else None)
     except Exception as e:
         st.error(f"Notion 连接失败，请稍后重试: {e}")
         trades = []
 
-    if not trades:
-        st.info("暂无交易记录")
-    else:
-        st.markdown(f"共 **{len(trades)}** 条记录")
-
-        for idx, t in enumerate(trades):
-            status_emoji = {"PLANNED": "⏳", "ACTIVE": "🟢", "CLOSED": "✅"}.get(t["status"], "❓")
-            r_display = f" | R: {t['r_multiple']:.2f}" if t["r_multiple"] is not None else ""
-            with st.expander(
-                f"{status_emoji} **{t['ticker']}** — {t['direction']} | "
-                f"入场 ${t['entry_price']:.2f} | 止损 ${t['price_stop']:.2f} | "
-                f"状态: {t['status']}{r_display}"
-            ):
-                # 交易详情
-                c1, c2, c3, c4 = st.columns(4)
-                c1.metric("入场价", f"${t['entry_price']:.2f}")
-                c2.metric("止损", f"${t['price_stop']:.2f}")
-                c3.metric("目标", f"${t['profit_target']:.2f}" if t["profit_target"] else "N/A")
-                c4.metric("仓位", f"{t['position_pct']:.1f}%")
-
-                if t["thesis"]:
-                    st.caption(f"假设: {t['thesis'][:120]}")
-
-                # ── 操作区 ──
-                if t["status"] != "CLOSED":
-                    st.markdown("---")
-                    action_tabs = st.tabs(["平仓", "加仓", "减仓", "更新状态", "添加备注"])
-
-                    # Tab 1: 平仓 (全部退出)
-                    with action_tabs[0]:
-                        col_exit, col_note = st.columns([1, 2])
-                        with col_exit:
-                            exit_price = st.number_input(
-                                "退出价格", min_value=0.01, value=float(t["entry_price"]),
-                                step=0.01, format="%.2f", key=f"exit_{idx}")
-                        with col_note:
-                            close_notes = st.text_input(
-                                "退出备注 (可选)", placeholder="退出原因...",
-                                key=f"close_note_{idx}")
-
-                        if st.button("确认平仓", key=f"close_{idx}", type="primary"):
-                            try:
-                                result = close_trade(t["page_id"], exit_price, close_notes)
-                                st.success(
-                                    f"交易已关闭! R-Multiple: {result['r_multiple']:.2f} | "
-                                    f"收益: {result['return_pct']:.2%}")
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"平仓失败: {e}")
-
-                    # Tab 2: 加仓 (加码摊平)
-                    with action_tabs[1]:
-                        col_ap, col_apct = st.columns(2)
-                        with col_ap:
-                            add_price = st.number_input(
-                                "加仓价格", min_value=0.01, value=float(t["entry_price"]),
-                                step=0.01, format="%.2f", key=f"add_price_{idx}")
-                        with col_apct:
-                            add_pct = st.number_input(
-                                "加仓仓位 (占总资金 %)", min_value=0.1, max_value=100.0,
-                                value=min(t["position_pct"], 50.0), step=0.5, format="%.1f",
-                                key=f"add_pct_{idx}")
-                        add_reason = st.text_input(
-                            "加仓原因", placeholder="为什么加仓...",
-                            key=f"add_reason_{idx}")
-
-                        old_pos = t["position_pct"]
-                        new_pos = old_pos + add_pct
-                        new_cost = (t["entry_price"] * old_pos + add_price * add_pct) / new_pos
-                        st.caption(
-                            f"仓位: {old_pos:.1f}% → {new_pos:.1f}% | "
-                            f"成本: ${t['entry_price']:.2f} → ${new_cost:.2f}")
-
-                        if st.button("确认加仓", key=f"add_{idx}", type="primary"):
+    @st.fragment
+    def _trade_card(t: dict, idx: int) -> None:
+        """单条交易卡片；卡片内的交互只重跑本 fragment，不触发整页 rerun 与 Notion 拉取。"""
+        status_emoji = STATUS_EMOJI.get(t["status"], "❓")
+        r_display = f" | R: {t['r_multiple']:.2f}" if t["r_multiple"] is not None else ""
+        with st.expander(
+            f"{status_emoji} **{t['ticker']}** — {t['direction']} | "
+            f"入场 ${t['entry_price']:.2f} | 止损 ${t['price_stop']:.2f} | "
+            f"状态: {t['status']}{r_display}"
+        ):
+            # 交易详情
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("入场价", f"${t['entry_price']:.2f}")
+            c2.metric("止损", f"${t['price_stop']:.2f}")
+            c3.metric("目标", f"${t['profit_target']:.2f}" if t["profit_target"] else "N/A")
+            c4.metric("仓位", f"{t['position_pct']:.1f}%")
+
+            if t["thesis"]:
+                st.caption(f"假设: {t['thesis'][:120]}")
+
+            # ── 操作区 ──
+            if t["status"] != "CLOSED":
+                st.markdown("---")
+                action_tabs = st.tabs(["平仓", "加仓", "减仓", "更新状态", "添加备注"])
+
+                # Tab 1: 平仓 (全部退出)
+                with action_tabs[0]:
+                    col_exit, col_note = st.columns([1, 2])
+                    with col_exit:
+                        exit_price = st.number_input(
+                            "退出价格", min_value=0.01, value=float(t["entry_price"]),
+                            step=0.01, format="%.2f", key=f"exit_{idx}")
+                    with col_note:
+                        close_notes = st.text_input(
+                            "退出备注 (可选)", placeholder="退出原因...",
+                            key=f"close_note_{idx}")
+
+                    if st.button("确认平仓", key=f"close_{idx}", type="primary"):
+                        try:
+                            result = close_trade(t["page_id"], exit_price, close_notes, client=get_notion()[0])
+                            st.success(
+                                f"交易已关闭! R-Multiple: {result['r_multiple']:.2f} | "
+                                f"收益: {result['return_pct']:.2%}")
+                            _invalidate_trades()
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"平仓失败: {e}")
+
+                # Tab 2: 加仓 (加码摊平)
+                with action_tabs[1]:
+                    col_ap, col_apct = st.columns(2)
+                    with col_ap:
+                        add_price = st.number_input(
+                            "加仓价格", min_value=0.01, value=float(t["entry_price"]),
+                            step=0.01, format="%.2f", key=f"add_price_{idx}")
+                    with col_apct:
+                        add_pct = st.number_input(
+                            "加仓仓位 (占总资金 %)", min_value=0.1, max_value=100.0,
+                            value=min(t["position_pct"], 50.0), step=0.5, format="%.1f",
+                            key=f"add_pct_{idx}")
+                    add_reason = st.text_input(
+                        "加仓原因", placeholder="为什么加仓...",
+                        key=f"add_reason_{idx}")
+
+                    old_pos = t["position_pct"]
+                    new_pos = old_pos + add_pct
+                    new_cost = (t["entry_price"] * old_pos + add_price * add_pct) / new_pos
+                    st.caption(
+                        f"仓位: {old_pos:.1f}% → {new_pos:.1f}% | "
+                        f"成本: ${t['entry_price']:.2f} → ${new_cost:.2f}")
+
+                    if st.button("确认加仓", key=f"add_{idx}", type="primary"):
+                        try:
+                            note_text = (
+                                f"[加仓] 价格 ${add_price:.2f} | "
+                                f"加仓 {add_pct:.1f}% | "
+                                f"仓位 {old_pos:.1f}% → {new_pos:.1f}% | "
+                                f"成本 ${t['entry_price']:.2f} → ${new_cost:.2f}"
+                            )
+                            if add_reason:
+                                note_text += f" | 原因: {add_reason}"
+                            update_trade(t["page_id"], props={
+                                "Entry Price": round(new_cost, 2),
+                                "Position %": new_pos / 100,
+                            }, note=note_text, client=get_notion()[0])
+                            st.success(
+                                f"加仓成功! 成本 ${new_cost:.2f} | 仓位 {new_pos:.1f}%")
+                            _invalidate_trades()
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"加仓失败: {e}")
+
+                # Tab 3: 减仓 (部分退出)
+                with action_tabs[2]:
+                    col_rp, col_rpct = st.columns(2)
+                    with col_rp:
+                        reduce_price = st.number_input(
+                            "减仓价格", min_value=0.01, value=float(t["entry_price"]),
+                            step=0.01, format="%.2f", key=f"reduce_price_{idx}")
+                    with col_rpct:
+                        reduce_pct = st.slider(
+                            "减仓比例", 10, 90, 50, 10,
+                            format="%d%%", key=f"reduce_pct_{idx}",
+                            help="减掉当前仓位的百分比")
+                    reduce_reason = st.text_input(
+                        "减仓原因", placeholder="为什么减仓...",
+                        key=f"reduce_reason_{idx}")
+
+                    new_position = t["position_pct"] * (1 - reduce_pct / 100)
+                    st.caption(f"仓位变化: {t['position_pct']:.1f}% → {new_position:.1f}%")
+
+                    if st.button("确认减仓", key=f"reduce_{idx}", type="primary"):
+                        try:
+                            note_text = (
+                                f"[减仓] 价格 ${reduce_price:.2f} | "
+                                f"减仓 {reduce_pct}% | "
+                                f"仓位 {t['position_pct']:.1f}% → {new_position:.1f}%"
+                            )
+                            if reduce_reason:
+                                note_text += f" | 原因: {reduce_reason}"
+                            update_trade(t["page_id"], props={
+                                "Position %": new_position / 100,
+                            }, note=note_text, client=get_notion()[0])
+                            st.success(f"减仓成功! 仓位已更新为 {new_position:.1f}%")
+                            _invalidate_trades()
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"减仓失败: {e}")
+
+                # Tab 4: 更新状态
+                with action_tabs[3]:
+                    new_status_options = [s for s in ["PLANNED", "ACTIVE"] if s != t["status"]]
+                    if new_status_options:
+                        new_status = st.selectbox(
+                            "新状态", new_status_options, key=f"status_{idx}")
+                        if st.button("更新状态", key=f"update_{idx}"):
                             try:
-                                note_text = (
-                                    f"[加仓] 价格 ${add_price:.2f} | "
-                                    f"加仓 {add_pct:.1f}% | "
-                                    f"仓位 {old_pos:.1f}% → {new_pos:.1f}% | "
-                                    f"成本 ${t['entry_price']:.2f} → ${new_cost:.2f}"
-                                )
-                                if add_reason:
-                                    note_text += f" | 原因: {add_reason}"
-                                add_psych_note(t["page_id"], note_text)
-                                update_trade_status(t["page_id"], {
-                                    "Entry Price": round(new_cost, 2),
-                                    "Position %": new_pos / 100,
-                                })
-                                st.success(
-                                    f"加仓成功! 成本 ${new_cost:.2f} | 仓位 {new_pos:.1f}%")
+                                update_trade_status(t["page_id"], {"Status": new_status}, client=get_notion()[0])
+                                st.success(f"状态已更新为 {new_status}")
+                                _invalidate_trades()
                                 st.rerun()
                             except Exception as e:
-                                st.error(f"加仓失败: {e}")
-
-                    # Tab 3: 减仓 (部分退出)
-                    with action_tabs[2]:
-                        col_rp, col_rpct = st.columns(2)
-                        with col_rp:
-                            reduce_price = st.number_input(
-                                "减仓价格", min_value=0.01, value=float(t["entry_price"]),
-                                step=0.01, format="%.2f", key=f"reduce_price_{idx}")
-                        with col_rpct:
-                            reduce_pct = st.slider(
-                                "减仓比例", 10, 90, 50, 10,
-                                format="%d%%", key=f"reduce_pct_{idx}",
-                                help="减掉当前仓位的百分比")
-                        reduce_reason = st.text_input(
-                            "减仓原因", placeholder="为什么减仓...",
-                            key=f"reduce_reason_{idx}")
-
-                        new_position = t["position_pct"] * (1 - reduce_pct / 100)
-                        st.caption(f"仓位变化: {t['position_pct']:.1f}% → {new_position:.1f}%")
-
-                        if st.button("确认减仓", key=f"reduce_{idx}", type="primary"):
+                                st.error(f"更新失败: {e}")
+
+                # Tab 5: 添加备注
+                with action_tabs[4]:
+                    new_note = st.text_area(
+                        "心理备注", placeholder="记录当前心理状态...",
+                        key=f"note_{idx}", height=80)
+                    if st.button("添加备注", key=f"add_note_{idx}"):
+                        if new_note.strip():
                             try:
-                                note_text = (
-                                    f"[减仓] 价格 ${reduce_price:.2f} | "
-                                    f"减仓 {reduce_pct}% | "
-                                    f"仓位 {t['position_pct']:.1f}% → {new_position:.1f}%"
-                                )
-                                if reduce_reason:
-                                    note_text += f" | 原因: {reduce_reason}"
-                                add_psych_note(t["page_id"], note_text)
-                                update_trade_status(t["page_id"], {
-                                    "Position %": new_position / 100,
-                                })
-                                st.success(f"减仓成功! 仓位已更新为 {new_position:.1f}%")
+                                add_psych_note(t["page_id"], new_note.strip(), client=get_notion()[0])
+                                st.success("备注已添加")
+                                _invalidate_trades()
                                 st.rerun()
                             except Exception as e:
-                                st.error(f"减仓失败: {e}")
-
-                    # Tab 4: 更新状态
-                    with action_tabs[3]:
-                        new_status_options = [s for s in ["PLANNED", "ACTIVE"] if s != t["status"]]
-                        if new_status_options:
-                            new_status = st.selectbox(
-                                "新状态", new_status_options, key=f"status_{idx}")
-                            if st.button("更新状态", key=f"update_{idx}"):
-                                try:
-                                    update_trade_status(t["page_id"], {"Status": new_status})
-                                    st.success(f"状态已更新为 {new_status}")
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"更新失败: {e}")
-
-                    # Tab 5: 添加备注
-                    with action_tabs[4]:
-                        new_note = st.text_area(
-                            "心理备注", placeholder="记录当前心理状态...",
-                            key=f"note_{idx}", height=80)
-                        if st.button("添加备注", key=f"add_note_{idx}"):
-                            if new_note.strip():
-                                try:
-                                    add_psych_note(t["page_id"], new_note.strip())
-                                    st.success("备注已添加")
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"添加失败: {e}")
-                            else:
-                                st.warning("请输入备注内容")
-                else:
-                    # 已关闭的交易显示结果
-                    st.markdown("---")
-                    rc1, rc2, rc3 = st.columns(3)
-                    rc1.metric("退出价", f"${t['actual_exit']:.2f}" if t["actual_exit"] else "N/A")
-                    rc2.metric("R-Multiple", f"{t['r_multiple']:.2f}" if t["r_multiple"] is not None else "N/A")
-                    rc3.metric("收益率", f"{t['actual_return_pct']:.2%}" if t["actual_return_pct"] is not None else "N/A")
-                    if t["psych_notes"]:
-                        st.caption(f"备注: {t['psych_notes']}")
+                                st.error(f"添加失败: {e}")
+                        else:
+                            st.warning("请输入备注内容")
+            else:
+                # 已关闭的交易显示结果
+                st.markdown("---")
+                rc1, rc2, rc3 = st.columns(3)
+                rc1.metric("退出价", f"${t['actual_exit']:.2f}" if t["actual_exit"] else "N/A")
+                rc2.metric("R-Multiple", f"{t['r_multiple']:.2f}" if t["r_multiple"] is not None else "N/A")
+                rc3.metric("收益率", f"{t['actual_return_pct']:.2%}" if t["actual_return_pct"] is not None else "N/A")
+                if t["psych_notes"]:
+                    st.caption(f"备注: {t['psych_notes']}")
+
+    if not trades:
+        st.info("暂无交易记录")
+    else:
+        st.markdown(f"共 **{len(trades)}** 条记录")
+
+        for idx, t in enumerate(trades):
+            _trade_card(t, idx)
 
 # =====================================================================
 # PAGE 3: 月度复盘
@@ -464,40 +597,20 @@ elif page == "📊 月度复盘":
     generate = st.button("生成复盘报告", type="primary", use_container_width=True)
 
     if generate:
-        from analytics_engine import (
-            calc_statistics, find_highlights, find_error_fingerprints,
-            calc_discipline_score, deep_analysis, generate_suggestions,
-            render_html_report, calc_position_analysis, calc_risk_profile,
-        )
-        from notion_bridge import fetch_all_trades
-
-        _, last_day = calendar.monthrange(review_year, review_month)
-        start = f"{review_year}-{review_month:02d}-01T00:00:00Z"
-        end = f"{review_year}-{review_month:02d}-{last_day}T23:59:59Z"
-        period = f"{review_year}-{review_month:02d}"
-
-        with st.spinner("正在从 Notion 拉取交易记录..."):
-            trades = fetch_all_trades(date_range=(start, end))
+        period = month_bounds(review_year, review_month)[2]
+        review_data = build_review(review_year, review_month)
 
-        if not trades:
+        if review_data is None:
             st.warning(f"{period} 无交易记录")
         else:
-            stats = calc_statistics(trades)
-            highlights = find_highlights(trades)
-            fingerprints = find_error_fingerprints(trades)
-            discipline = calc_discipline_score(trades)
-            deep = deep_analysis(trades)
-            position_analysis = calc_position_analysis(trades)
-            risk_profile = calc_risk_profile(trades)
-            suggestions = generate_suggestions(fingerprints, discipline, risk_profile)
-
-            review_data = {
-                "period": period, "trades": trades, "statistics": stats,
-                "highlights": highlights, "fingerprints": fingerprints,
-                "discipline": discipline, "deep_analysis": deep,
-                "suggestions": suggestions, "position_analysis": position_analysis,
-                "risk_profile": risk_profile,
-            }
+            stats = review_data["statistics"]
+            highlights = review_data["highlights"]
+            fingerprints = review_data["fingerprints"]
+            discipline = review_data["discipline"]
+            deep = review_data["deep_analysis"]
+            position_analysis = review_data["position_analysis"]
+            risk_profile = review_data["risk_profile"]
+            suggestions = review_data["suggestions"]
 
             # ── 核心指标卡片 ──
             st.markdown("### 核心指标")
@@ -513,22 +626,9 @@ elif page == "📊 月度复盘":
             c7.metric("最差 R", f"{stats.get('worst_r', 0):.2f}")
             c8.metric("最大回撤", f"{stats.get('max_drawdown', 0):.2f}R")
 
-            # ── 生成 HTML 并嵌入 ──
-            from config import load_config
-            cfg = load_config()
-            output_dir = cfg.get("reports", {}).get("output_dir", tempfile.gettempdir())
-            # 确保目录存在
-            try:
-                Path(output_dir).mkdir(parents=True, exist_ok=True)
-            except OSError:
-                output_dir = tempfile.gettempdir()
-            output_path = f"{output_dir}/{period}_review.html"
-            render_html_report(review_data, output_path)
-
-            with open(output_path, "r") as f:
-                html_content = f.read()
+            # ── 嵌入 HTML 报告 ──
             st.markdown("### 交互式图表")
-            st.components.v1.html(html_content, height=2100, scrolling=True)
+            st.components.v1.html(review_data["html"], height=2100, scrolling=True)
 
             # ── 仓位分布与个股收益 ──
             st.markdown("### 仓位分布与个股收益")
@@ -551,17 +651,19 @@ elif page == "📊 月度复盘":
             # 个股收益
             ticker_stats = position_analysis.get("ticker_stats", {})
             if ticker_stats:
-                for ticker, ts in ticker_stats.items():
-                    wr_color = "green" if ts["win_rate"] >= 0.5 else "red"
-                    r_color = "green" if ts["total_r"] >= 0 else "red"
-                    st.markdown(
-                        f"**{ticker}** — "
-                        f"交易 {ts['trades']} 笔 | "
-                        f"胜率 :{wr_color}[{ts['win_rate']:.0%}] | "
-                        f"平均R :{r_color}[{ts['avg_r']:.2f}] | "
-                        f"总R :{r_color}[{ts['total_r']:.2f}] | "
-                        f"平均收益 {ts['avg_return']:.2%}"
-                    )
+                ts_df = (
+                    pd.DataFrame.from_dict(ticker_stats, orient="index")
+                    [["trades", "win_rate", "avg_r", "total_r", "avg_return"]]
+                    .rename(columns={"trades": "交易笔数", "win_rate": "胜率", "avg_r": "平均R",
+                                     "total_r": "总R", "avg_return": "平均收益"})
+                )
+                st.dataframe(
+                    ts_df.style
+                    .map(lambda v: f"color: {'green' if v >= 0.5 else 'red'}", subset=["胜率"])
+                    .map(lambda v: f"color: {'green' if v >= 0 else 'red'}", subset=["平均R", "总R"])
+                    .format({"胜率": "{:.0%}", "平均R": "{:.2f}", "总R": "{:.2f}", "平均收益": "{:.2%}"}),
+                    use_container_width=True,
+                )
             else:
                 st.caption("暂无已关闭交易的个股数据")
 
@@ -580,7 +682,6 @@ elif page == "📊 月度复盘":
             with rp2:
                 for f in risk_profile.get("factors", []):
                     bar_pct = f["score"]
-                    bar_color = "#FF1744" if bar_pct >= 70 else "#FFC107" if bar_pct >= 40 else "#00C853"
                     st.markdown(
                         f"**{f['name']}**: {f['value']} ({f['detail']}) — "
                         f"激进度 {bar_pct:.0f}/100"
@@ -591,7 +692,7 @@ elif page == "📊 月度复盘":
             if highlights:
                 st.markdown("### 高光时刻")
                 for h in highlights:
-                    st.success(f"**{h['ticker']}** {h['r_multiple']:.2f}R | {h.get('entry_emotion', '')} | {h.get('thesis', '')[:80]}")
+                    st.success(f"**{h.ticker}** {h.r_multiple:.2f}R | {h.entry_emotion} | {h.thesis[:80]}")
 
             # ── 错误指纹 ──
             if fingerprints.get("patterns"):
@@ -615,8 +716,7 @@ elif page == "📊 月度复盘":
             sync_notion = st.button("同步报告摘要到 Notion", use_container_width=True)
             if sync_notion:
                 try:
-                    from notion_bridge import ensure_database
-                    client, db_id = ensure_database()
+                    client, db_id = get_notion()
                     summary_text = (
                         f"月度复盘 {period}\n"
                         f"总交易: {stats['total']} | 已关闭: {stats.get('closed', 0)}\n"
@@ -624,7 +724,7 @@ elif page == "📊 月度复盘":
                         f"纪律评分: {discipline.get('score', 100):.0f}/100\n\n"
                         f"行动建议:\n" + "\n".join(f"• {s}" for s in suggestions)
                     )
-                    parent_page_id = cfg.get("notion", {}).get("parent_page_id", "")
+                    parent_page_id = _cfg().get("notion", {}).get("parent_page_id", "")
                     client.pages.create(
                         parent={"type": "page_id", "page_id": parent_page_id},
                         properties={"title": [{"text": {"content": f"Review {period}"}}]},
@@ -12,7 +12,7 @@ from rich.table import Table
 PROJECT_DIR = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_DIR))
 
-from utils import console, fmt_pct, fmt_price, fmt_r
+from utils import console, fmt_pct, fmt_price_text, fmt_r
 
 BANNER = """
 [cyan]╔══════════════════════════════════════════════════════╗
@@ -90,7 +90,8 @@ def note(page_id, note):
 
 @cli.command()
 @click.option("--month", required=True, help="月份 (YYYY-MM)")
-def review(month):
+@click.option("--refresh", is_flag=True, help="忽略本地缓存，重新从 Notion 拉取")
+def review(month, refresh):
     """生成月度复盘报告"""
     console.print(BANNER)
     try:
@@ -101,7 +102,7 @@ def review(month):
         return
 
     from analytics_engine import generate_monthly_review
-    generate_monthly_review(year, m)
+    generate_monthly_review(year, m, refresh=refresh)
 
 
 # ── status: 当前持仓概览 ─────────────────────────────────────────
@@ -132,9 +133,9 @@ def status():
         table.add_row(
             t["ticker"],
             t["direction"],
-            fmt_price(t["entry_price"] or 0),
-            fmt_price(t["price_stop"] or 0),
-            fmt_price(t["profit_target"] or 0),
+            fmt_price_text(t["entry_price"] or 0),
+            fmt_price_text(t["price_stop"] or 0),
+            fmt_price_text(t["profit_target"] or 0),
             f"{t['position_pct']:.1f}%",
             f"[{emotion_style}]{t['entry_emotion']}[/{emotion_style}]",
             f"{t['risk_reward']:.1f}" if t["risk_reward"] else "N/A",
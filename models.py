@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TradeHypothesis:
     ticker: str
     direction: str  # LONG / SHORT / REDUCE_LONG / REDUCE_SHORT
@@ -18,7 +18,7 @@ class TradeHypothesis:
     technical_confirmed: bool  # 是否有技术面确认
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class InvalidationPlan:
     price_stop: float
     time_stop: str  # ISO date string
@@ -28,18 +28,18 @@ class InvalidationPlan:
     action_at_target: str  # TAKE_PROFIT / PYRAMID / HOLD
 
 
-EXTREME_EMOTIONS = {"fearful", "fomo", "fatigued"}
-VALID_EMOTIONS = {"confident", "fearful", "fomo", "fatigued", "calm", "exploratory"}
+EXTREME_EMOTIONS = frozenset({"fearful", "fomo", "fatigued"})
+VALID_EMOTIONS = frozenset({"confident", "fearful", "fomo", "fatigued", "calm", "exploratory"})
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PsychologyCheck:
     emotion: str  # confident/fearful/fomo/fatigued/calm/exploratory
     is_extreme: bool
     note: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PositionPlan:
     win_rate: float
     risk_reward: float
@@ -47,7 +47,7 @@ class PositionPlan:
     entry_price: float
 
 
-@dataclass
+@dataclass(slots=True)
 class TradePlan:
     hypothesis: TradeHypothesis
     invalidation: InvalidationPlan
@@ -56,3 +56,37 @@ class TradePlan:
     timestamp: datetime = field(default_factory=datetime.now)
     status: str = "PLANNED"  # PLANNED / ACTIVE / CLOSED
     notion_page_id: str = ""
+
+
+@dataclass(slots=True)
+class TradeRow:
+    """fetch_all_trades 返回记录的只读分析视图 (属性访问, 无 __dict__)。"""
+    page_id: str = ""
+    ticker: str = ""
+    direction: str = ""
+    entry_price: float = 0.0
+    position_pct: float = 0.0
+    profit_target: float = 0.0
+    risk_reward: float = 0.0
+    win_rate: float = 0.0
+    price_stop: float = 0.0
+    time_stop: str = ""
+    logic_stop: str = ""
+    entry_emotion: str = ""
+    familiarity: int | None = None
+    technical_confirmed: bool = False
+    thesis: str = ""
+    status: str = ""
+    actual_exit: float | None = None
+    actual_return_pct: float | None = None
+    r_multiple: float | None = None
+    deviation_pct: float | None = None
+    psych_notes: str = ""
+    created: str = ""
+
+    @classmethod
+    def from_dict(cls, d: dict) -> TradeRow:
+        return cls(**{k: d[k] for k in TRADE_ROW_FIELDS if k in d})
+
+
+TRADE_ROW_FIELDS = tuple(f.name for f in fields(TradeRow))
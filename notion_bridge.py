@@ -2,9 +2,22 @@
 
 from __future__ import annotations
 
-from notion_client import Client
-
-from config import get_notion_api_key, load_config, save_config, _IS_CLOUD
+import asyncio
+import functools
+import hashlib
+import importlib.util
+import random
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from urllib.parse import unquote
+
+import httpx
+from notion_client import APIResponseError, AsyncClient, Client
+
+from config import get_notion_api_key, load_config, save_config, _config_mtime, _IS_CLOUD
 from models import TradePlan
 from utils import calc_r_multiple, console
 
@@ -60,28 +73,161 @@ DB_PROPERTIES = {
 }
 
 
+# ── 限流与 429 重试 ──────────────────────────────────────────────
+
+_RATE_PER_SEC = 3.0  # Notion 平均限速 3 req/s
+_MAX_RETRIES = 5
+
+
+class _TokenBucket:
+    """单调时钟令牌桶 (线程安全, 同步/异步共用)：令牌不足时预占并在锁外等待。"""
+
+    def __init__(self, rate: float, capacity: float):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """取走一个令牌, 返回需要等待的秒数。"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._stamp) * self._rate)
+            self._stamp = now
+            self._tokens -= 1
+            return -self._tokens / self._rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+_BUCKET = _TokenBucket(_RATE_PER_SEC, _RATE_PER_SEC)
+
+
+def _backoff(e: APIResponseError, attempt: int) -> float:
+    """429 时返回重试前的等待秒数 (Retry-After, 缺省指数退避, 加抖动)；其他错误或重试耗尽时原样抛出。"""
+    if e.status != 429 or attempt == _MAX_RETRIES - 1:
+        raise e
+    return float(e.headers.get("Retry-After", 2 ** attempt)) * (1 + random.random() / 2)
+
+
+class _RateLimitedClient(Client):
+    """所有请求先过令牌桶；429 时按 _backoff 重试。"""
+
+    def request(self, path, method, query=None, body=None, auth=None):
+        for attempt in range(_MAX_RETRIES):
+            _BUCKET.acquire()
+            try:
+                return super().request(path, method, query, body, auth)
+            except APIResponseError as e:
+                delay = _backoff(e, attempt)
+            time.sleep(delay)
+        raise RuntimeError("unreachable")
+
+
+class _RateLimitedAsyncClient(AsyncClient):
+    """_RateLimitedClient 的异步版本, 与同步路径共用同一个令牌桶。"""
+
+    async def request(self, path, method, query=None, body=None, auth=None):
+        for attempt in range(_MAX_RETRIES):
+            await _BUCKET.acquire_async()
+            try:
+                return await super().request(path, method, query, body, auth)
+            except APIResponseError as e:
+                delay = _backoff(e, attempt)
+            await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+
 # ── 辅助函数 ─────────────────────────────────────────────────────
 
+# h2 随 httpx[http2] 安装; 缺失时退回 HTTP/1.1 keep-alive
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+def build_client(api_key: str) -> Client:
+    """创建 Notion client，底层 httpx 连接池保持 keep-alive (可用时走 HTTP/2 多路复用)，多次请求复用同一 TLS 连接。"""
+    transport = httpx.HTTPTransport(
+        http2=_HTTP2, retries=3,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=300),
+    )
+    return _RateLimitedClient(auth=api_key, client=httpx.Client(transport=transport))
+
+
+# (config.yaml mtime, client, database_id)；配置文件未变化时复用同一个 client
+# 被替换的旧 client 不主动 close: 其他线程可能仍在使用, 交给 GC 回收连接池
+_CLIENT_CACHE: tuple[float, Client, str] | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _cached_client() -> tuple[Client, str] | None:
+    cache = _CLIENT_CACHE
+    if cache is not None and cache[0] == _config_mtime():
+        return cache[1], cache[2]
+    return None
+
+
+def invalidate_notion_cache() -> None:
+    """丢弃缓存的 client (测试或手动切换账号时使用)。"""
+    global _CLIENT_CACHE
+    with _CLIENT_LOCK:
+        _CLIENT_CACHE = None
+
+
 def _get_client(cfg: dict) -> Client:
-    return Client(auth=get_notion_api_key(cfg))
+    """cfg 来自 load_config() (同样按 mtime 缓存)；配置文件变化后重建 client。"""
+    global _CLIENT_CACHE
+    cached = _cached_client()
+    if cached is not None:
+        return cached[0]
+    with _CLIENT_LOCK:
+        cached = _cached_client()  # 加锁后复查, 避免并发线程重复创建
+        if cached is not None:
+            return cached[0]
+        client = build_client(get_notion_api_key(cfg))
+        _CLIENT_CACHE = (_config_mtime(), client, cfg.get("notion", {}).get("database_id", ""))
+        return client
+
+
+# 空字段共享同一个空列表; 仅用于序列化, 不可修改
+_EMPTY_RT: list[dict] = []
 
 
 def _rich_text(text: str) -> list[dict]:
-    return [{"text": {"content": text[:2000]}}] if text else []
+    return [{"text": {"content": text[:2000]}}] if text else _EMPTY_RT
 
 
 def _title_text(text: str) -> list[dict]:
     return [{"text": {"content": text}}]
 
 
+@functools.lru_cache(maxsize=64)
+def _select(name: str) -> dict:
+    # select 取值来自固定词表 (方向/情绪/状态), 同名 payload 只构造一次; 仅用于序列化, 不可修改
+    return {"select": {"name": name}}
+
+
 # ── 自动创建数据库 ───────────────────────────────────────────────
 
-def ensure_database(cfg: dict | None = None) -> tuple[Client, str]:
+def ensure_database(cfg: dict | None = None, client: Client | None = None) -> tuple[Client, str]:
     """确保 Notion 数据库存在，不存在则自动创建。返回 (client, database_id)。"""
+    global _CLIENT_CACHE
     if cfg is None:
+        cached = _cached_client() if client is None else None
+        if cached is not None and cached[1]:
+            return cached
         cfg = load_config()
 
-    client = _get_client(cfg)
+    if client is None:
+        client = _get_client(cfg)
     db_id = cfg.get("notion", {}).get("database_id", "")
 
     if db_id:
@@ -100,17 +246,103 @@ def ensure_database(cfg: dict | None = None) -> tuple[Client, str]:
     db_id = response["id"]
     cfg["notion"]["database_id"] = db_id
     save_config(cfg)  # 云端时自动跳过
+    with _CLIENT_LOCK:
+        if _CLIENT_CACHE is not None and _CLIENT_CACHE[1] is client:
+            # 写回配置改变了 mtime: 刷新缓存键与 database_id, 避免下次调用重建仍在使用的 client
+            _CLIENT_CACHE = (_config_mtime(), client, db_id)
     console.print(f"[profit]Notion 数据库已创建: {db_id}[/profit]")
     if _IS_CLOUD:
         console.print("[warn]请将 database_id 添加到 Streamlit Cloud Secrets 中[/warn]")
     return client, db_id
 
 
+# ── 复盘本地缓存 ─────────────────────────────────────────────────
+
+def trade_cache_path(period: str) -> Path:
+    """某月 ("YYYY-MM") 交易记录的本地缓存文件 (analytics_engine 读写, 本模块写操作后清除)。"""
+    cfg = load_config()
+    db_id = cfg.get("notion", {}).get("database_id", "")
+    key = hashlib.sha256(f"{period}|{db_id}".encode()).hexdigest()[:16]
+    return Path(cfg.get("cache", {}).get("dir", "./cache")) / f"trades_{key}.json"
+
+
+def _invalidate_trade_cache(page: dict) -> None:
+    """页面被修改后删除其所属月份的缓存；无法确定月份时清空全部缓存。"""
+    created = page.get("created_time", "") if isinstance(page, dict) else ""
+    try:
+        if created:
+            trade_cache_path(created[:7]).unlink(missing_ok=True)
+        else:
+            for path in trade_cache_path("").parent.glob("trades_*.json"):
+                path.unlink(missing_ok=True)
+    except OSError:
+        pass  # 只读环境 (云端) 无缓存
+
+
 # ── CRUD 操作 ────────────────────────────────────────────────────
 
-def sync_trade_plan(plan: TradePlan) -> str:
-    """将交易计划同步到 Notion，返回 page_id。"""
-    client, db_id = ensure_database()
+# page_id → (入场价, 止损, 方向, 盈利目标)；建仓 / 查询 / 更新时写入，平仓时省去一次 pages.retrieve
+_META_FIELDS = ("Entry Price", "Price Stop", "Direction", "Profit Target")
+_PLAN_META_CACHE: dict[str, tuple[float, float, str, float]] = {}
+
+# database_id (去连字符) → _META_FIELDS 对应的 property id (filter_properties 只接受 id)
+# 从已拿到的页面对象中顺带记录, 不为此额外请求; 未知时平仓走完整 retrieve
+_META_PROPERTY_IDS: dict[str, list[str]] = {}
+
+
+def _learn_property_ids(page: dict) -> None:
+    try:
+        db_key = page["parent"]["database_id"].replace("-", "")
+        if db_key not in _META_PROPERTY_IDS:
+            props = page["properties"]
+            # API 返回的 id 已经过 URL 编码, 还原后交给 httpx 编码, 避免二次转义
+            _META_PROPERTY_IDS[db_key] = [unquote(props[f]["id"]) for f in _META_FIELDS]
+    except (KeyError, TypeError, AttributeError):
+        pass
+
+
+# page_id → (过期时刻, 页面对象)；pages.update 的返回值直接写入，平仓后追加备注无需再 retrieve
+_PAGE_TTL = 30.0
+_PAGE_CACHE_MAX = 256
+_PAGE_CACHE: dict[str, tuple[float, dict]] = {}
+_PAGE_CACHE_LOCK = threading.Lock()  # Streamlit 各会话线程共享同一份缓存
+
+
+def _remember_page(page_id: str, page: dict) -> None:
+    _learn_property_ids(page)
+    with _PAGE_CACHE_LOCK:
+        _PAGE_CACHE.pop(page_id, None)
+        _PAGE_CACHE[page_id] = (time.monotonic() + _PAGE_TTL, page)
+        if len(_PAGE_CACHE) > _PAGE_CACHE_MAX:
+            del _PAGE_CACHE[next(iter(_PAGE_CACHE))]  # 淘汰最早写入的一项
+
+
+def _fresh_page(page_id: str) -> dict | None:
+    with _PAGE_CACHE_LOCK:
+        hit = _PAGE_CACHE.get(page_id)
+    return hit[1] if hit is not None and hit[0] > time.monotonic() else None
+
+
+def _retrieve_page(client: Client, page_id: str) -> dict:
+    page = _fresh_page(page_id)
+    if page is None:
+        page = client.pages.retrieve(page_id=page_id)
+        _remember_page(page_id, page)
+    return page
+
+
+def _page_meta(props: dict) -> tuple[float, float, str, float] | None:
+    """原始 properties → 平仓元数据；任一字段为空时返回 None (不缓存, 平仓时走 retrieve 原路径)。"""
+    try:
+        meta = (props["Entry Price"]["number"], props["Price Stop"]["number"],
+                props["Direction"]["select"]["name"], props["Profit Target"]["number"])
+    except _MISSING:
+        return None
+    return None if None in meta else meta
+
+
+def _build_properties(plan: TradePlan) -> dict:
+    """交易计划 → Notion properties (纯函数, 无 I/O)。"""
     h = plan.hypothesis
     inv = plan.invalidation
     psy = plan.psychology
@@ -118,7 +350,7 @@ def sync_trade_plan(plan: TradePlan) -> str:
 
     properties = {
         "Ticker": {"title": _title_text(h.ticker)},
-        "Direction": {"select": {"name": h.direction}},
+        "Direction": _select(h.direction),
         "Entry Price": {"number": pos.entry_price},
         "Position %": {"number": pos.position_pct / 100},
         "Profit Target": {"number": inv.profit_target_1},
@@ -126,64 +358,123 @@ def sync_trade_plan(plan: TradePlan) -> str:
         "Win Rate": {"number": pos.win_rate},
         "Price Stop": {"number": inv.price_stop},
         "Logic Stop": {"rich_text": _rich_text(inv.logic_stop)},
-        "Entry Emotion": {"select": {"name": psy.emotion}},
+        "Entry Emotion": _select(psy.emotion),
         "Familiarity": {"number": h.familiarity_score},
         "Technical Confirmed": {"checkbox": h.technical_confirmed},
         "Thesis": {"rich_text": _rich_text(h.thesis)},
         "Known Factors": {"rich_text": _rich_text(h.known_factors)},
         "Unknown Factors": {"rich_text": _rich_text(h.unknown_factors)},
         "Priced In": {"rich_text": _rich_text(h.priced_in)},
-        "Status": {"select": {"name": plan.status}},
+        "Status": _select(plan.status),
     }
     if inv.time_stop:
         properties["Time Stop"] = {"date": {"start": inv.time_stop}}
     if psy.note:
         properties["Psych Notes"] = {"rich_text": _rich_text(psy.note)}
+    return properties
+
 
-    page = client.pages.create(parent={"database_id": db_id}, properties=properties)
+def sync_trade_plan(plan: TradePlan, *, client: Client | None = None) -> str:
+    """将交易计划同步到 Notion，返回 page_id。可传入已有 client 复用连接。"""
+    client, db_id = ensure_database(client=client)
+    page = client.pages.create(parent={"database_id": db_id}, properties=_build_properties(plan))
+    _PLAN_META_CACHE[page["id"]] = _plan_meta(plan)
     return page["id"]
 
 
-def update_trade_status(page_id: str, updates: dict) -> None:
-    """更新交易记录的动态字段。"""
-    cfg = load_config()
-    client = _get_client(cfg)
-    properties = {}
-    for key, value in updates.items():
-        if key in ("Status", "Direction", "Entry Emotion"):
-            properties[key] = {"select": {"name": value}}
-        elif key == "Technical Confirmed":
-            properties[key] = {"checkbox": value}
-        elif key in ("Entry Price", "Position %", "Profit Target", "Risk Reward",
-                      "Win Rate", "Price Stop", "Actual Exit",
-                      "Actual Return %", "R Multiple", "Deviation %", "Familiarity"):
-            properties[key] = {"number": value}
-        elif key in ("Thesis", "Logic Stop", "Psych Notes", "Known Factors",
-                      "Unknown Factors", "Priced In"):
-            properties[key] = {"rich_text": _rich_text(value)}
-        elif key == "Time Stop" and value:
-            properties[key] = {"date": {"start": value}}
-    client.pages.update(page_id=page_id, properties=properties)
-
-
-def close_trade(page_id: str, exit_price: float, notes: str = "") -> dict:
-    """关闭交易，自动计算 R-Multiple 和偏差。"""
+def _plan_meta(plan: TradePlan) -> tuple[float, float, str, float]:
+    return (plan.position.entry_price, plan.invalidation.price_stop,
+            plan.hypothesis.direction, plan.invalidation.profit_target_1)
+
+
+# Notion 限速约 3 req/s: 并发上限 3, 遇 429 指数退避
+_SYNC_CONCURRENCY = 3
+
+
+async def _sync_one(client: AsyncClient, db_id: str, plan: TradePlan, sem: asyncio.Semaphore) -> str:
+    # 速率限制与 429 重试由 _RateLimitedAsyncClient 负责, 信号量只限制同时在途的请求数
+    async with sem:
+        page = await client.pages.create(parent={"database_id": db_id}, properties=_build_properties(plan))
+    _PLAN_META_CACHE[page["id"]] = _plan_meta(plan)
+    return page["id"]
+
+
+async def sync_trade_plans_async(plans: list[TradePlan]) -> list[str]:
+    """并发同步多个交易计划，按输入顺序返回 page_id。"""
     cfg = load_config()
-    client = _get_client(cfg)
+    _, db_id = ensure_database(cfg)
+    sem = asyncio.Semaphore(_SYNC_CONCURRENCY)
+    # AsyncClient 绑定事件循环, 每次调用单独创建
+    async with _RateLimitedAsyncClient(auth=get_notion_api_key(cfg)) as client:
+        return list(await asyncio.gather(*(_sync_one(client, db_id, p, sem) for p in plans)))
+
+
+def sync_trade_plans(plans: list[TradePlan]) -> list[str]:
+    """sync_trade_plans_async 的同步入口。"""
+    return asyncio.run(sync_trade_plans_async(plans))
+
+
+_SELECT_FIELDS = frozenset({"Status", "Direction", "Entry Emotion"})
+_NUMBER_FIELDS = frozenset({
+    "Entry Price", "Position %", "Profit Target", "Risk Reward", "Win Rate", "Price Stop",
+    "Actual Exit", "Actual Return %", "R Multiple", "Deviation %", "Familiarity",
+})
+_RICH_TEXT_FIELDS = frozenset({"Thesis", "Logic Stop", "Psych Notes", "Known Factors", "Unknown Factors", "Priced In"})
+
+# 字段名 → property 构造函数, 每个字段一次查表
+_BUILDERS = {
+    **{name: _select for name in _SELECT_FIELDS},
+    **{name: lambda v: {"number": v} for name in _NUMBER_FIELDS},
+    **{name: lambda v: {"rich_text": _rich_text(v)} for name in _RICH_TEXT_FIELDS},
+    "Technical Confirmed": lambda v: {"checkbox": v},
+    "Time Stop": lambda v: {"date": {"start": v}},
+}
+
+
+def _serialize_props(updates: dict) -> dict:
+    """将 {字段名: 值} 转为 Notion properties 结构 (未知字段与空的 Time Stop 忽略)。"""
+    return {
+        key: _BUILDERS[key](value)
+        for key, value in updates.items()
+        if key in _BUILDERS and (value or key != "Time Stop")
+    }
+
 
-    # 读取原始数据
-    page = client.pages.retrieve(page_id=page_id)
-    props = page["properties"]
-    entry = props["Entry Price"]["number"]
-    stop = props["Price Stop"]["number"]
-    direction = props["Direction"]["select"]["name"]
+def update_trade_status(page_id: str, updates: dict, *, client: Client | None = None) -> None:
+    """更新交易记录的动态字段。可传入已有 client 复用连接。"""
+    if client is None:
+        client = _get_client(load_config())
+    page = client.pages.update(page_id=page_id, properties=_serialize_props(updates))
+    _remember_page(page_id, page)
+    _invalidate_trade_cache(page)
+    meta = _PLAN_META_CACHE.get(page_id)
+    if meta is not None and any(f in updates for f in _META_FIELDS):
+        _PLAN_META_CACHE[page_id] = tuple(updates.get(f, old) for f, old in zip(_META_FIELDS, meta))
+
+
+def close_trade(page_id: str, exit_price: float, notes: str = "", *, client: Client | None = None) -> dict:
+    """关闭交易，自动计算 R-Multiple 和偏差。"""
+    if client is None:
+        client = _get_client(load_config())
+
+    # 读取原始数据 (缓存未命中才请求 Notion; 已知 property id 时只取这 4 个字段)
+    meta = _PLAN_META_CACHE.pop(page_id, None)
+    if meta is None:
+        db_key = load_config().get("notion", {}).get("database_id", "").replace("-", "")
+        ids = None if _fresh_page(page_id) else _META_PROPERTY_IDS.get(db_key)
+        page = (client.pages.retrieve(page_id=page_id, filter_properties=ids) if ids
+                else _retrieve_page(client, page_id))
+        props = page["properties"]
+        meta = (props["Entry Price"]["number"], props["Price Stop"]["number"],
+                props["Direction"]["select"]["name"], props["Profit Target"]["number"])
+    entry, stop, direction, target = meta
 
     r_mult = calc_r_multiple(entry, exit_price, stop, direction)
     if direction == "LONG":
         ret_pct = (exit_price - entry) / entry
     else:
         ret_pct = (entry - exit_price) / entry
-    deviation = abs(exit_price - props["Profit Target"]["number"]) / props["Profit Target"]["number"] if props["Profit Target"]["number"] else 0
+    deviation = abs(exit_price - target) / target if target else 0
 
     updates = {
         "Status": "CLOSED",
@@ -194,26 +485,52 @@ def close_trade(page_id: str, exit_price: float, notes: str = "") -> dict:
     }
     if notes:
         updates["Psych Notes"] = notes
-    update_trade_status(page_id, updates)
+    # 元数据缓存已在上方 pop, 无需经 update_trade_status 同步缓存, 直接写回
+    page = client.pages.update(page_id=page_id, properties=_serialize_props(updates))
+    _remember_page(page_id, page)
+    _invalidate_trade_cache(page)
     return {"r_multiple": r_mult, "return_pct": ret_pct, "deviation": deviation}
 
 
-def add_psych_note(page_id: str, note: str) -> None:
-    """追加心理备注。"""
-    cfg = load_config()
-    client = _get_client(cfg)
-    page = client.pages.retrieve(page_id=page_id)
+def _append_note(client: Client, page_id: str, note: str) -> str:
+    """读取现有心理备注并返回追加 note 后的全文。"""
+    page = _retrieve_page(client, page_id)
     existing = ""
     rt = page["properties"].get("Psych Notes", {}).get("rich_text", [])
     if rt:
         existing = rt[0].get("text", {}).get("content", "")
-    combined = f"{existing}\n---\n{note}" if existing else note
-    update_trade_status(page_id, {"Psych Notes": combined})
+    return f"{existing}\n---\n{note}" if existing else note
 
 
-def fetch_all_trades(status: str | None = None, date_range: tuple | None = None) -> list[dict]:
-    """查询交易记录。返回简化的 dict 列表。"""
-    client, db_id = ensure_database()
+def add_psych_note(page_id: str, note: str, *, client: Client | None = None) -> None:
+    """追加心理备注。"""
+    if client is None:
+        client = _get_client(load_config())
+    update_trade_status(page_id, {"Psych Notes": _append_note(client, page_id, note)}, client=client)
+
+
+def update_trade(page_id: str, props: dict | None = None, note: str | None = None,
+                 *, client: Client | None = None) -> None:
+    """更新字段并追加心理备注，合并为一次 pages.update。"""
+    if client is None:
+        client = _get_client(load_config())
+    updates = dict(props or {})
+    if note:
+        updates["Psych Notes"] = _append_note(client, page_id, note)
+    update_trade_status(page_id, updates, client=client)
+
+
+def fetch_all_trades(status: str | None = None, date_range: tuple | None = None,
+                     client: Client | None = None, db_id: str | None = None) -> list[dict]:
+    """查询交易记录。返回简化的 dict 列表。传入 (client, db_id) 时跳过 ensure_database。"""
+    return list(iter_trades(status, date_range, client=client, db_id=db_id))
+
+
+def iter_trades(status: str | None = None, date_range: tuple | None = None,
+                client: Client | None = None, db_id: str | None = None) -> Iterator[dict]:
+    """逐页查询交易记录并逐条产出，内存占用只与单页大小相关。"""
+    if client is None or not db_id:
+        client, db_id = ensure_database()
     filters = []
     if status:
         filters.append({"property": "Status", "select": {"equals": status}})
@@ -223,11 +540,10 @@ def fetch_all_trades(status: str | None = None, date_range: tuple | None = None)
         filters.append({"timestamp": "created_time", "created_time": {"on_or_before": end}})
 
     query_filter = {"and": filters} if filters else None
-    kwargs = {"database_id": db_id}
+    kwargs = {"database_id": db_id, "page_size": 100}
     if query_filter:
         kwargs["filter"] = query_filter
 
-    results = []
     has_more = True
     start_cursor = None
     while has_more:
@@ -237,56 +553,96 @@ def fetch_all_trades(status: str | None = None, date_range: tuple | None = None)
         # 兼容 dict 和 notion-client 对象
         resp = dict(response) if not isinstance(response, dict) else response
         for page in resp.get("results", []):
-            results.append(_parse_page(page))
+            trade = _parse_page(page)
+            _learn_property_ids(page)
+            meta = _page_meta(page["properties"]) if isinstance(page, dict) else None
+            if meta is not None:
+                _PLAN_META_CACHE[trade["page_id"]] = meta
+            yield trade
         has_more = resp.get("has_more", False)
         start_cursor = resp.get("next_cursor")
-    return results
 
 
 def _parse_page(page: dict) -> dict:
-    """将 Notion 页面解析为简化 dict。"""
+    """将 Notion 页面解析为简化 dict (按 _FIELD_SPEC 单次遍历)。"""
     p = page["properties"] if isinstance(page, dict) else dict(page).get("properties", {})
-    return {
-        "page_id": page["id"] if isinstance(page, dict) else str(page.get("id", "")),
-        "ticker": _extract_title(p.get("Ticker", {})),
-        "direction": _extract_select(p.get("Direction", {})),
-        "entry_price": p.get("Entry Price", {}).get("number") or 0,
-        "position_pct": (p.get("Position %", {}).get("number") or 0) * 100,
-        "profit_target": p.get("Profit Target", {}).get("number") or 0,
-        "risk_reward": p.get("Risk Reward", {}).get("number") or 0,
-        "win_rate": p.get("Win Rate", {}).get("number") or 0,
-        "price_stop": p.get("Price Stop", {}).get("number") or 0,
-        "time_stop": _extract_date(p.get("Time Stop", {})),
-        "logic_stop": _extract_rich_text(p.get("Logic Stop", {})),
-        "entry_emotion": _extract_select(p.get("Entry Emotion", {})),
-        "familiarity": p.get("Familiarity", {}).get("number"),
-        "technical_confirmed": p.get("Technical Confirmed", {}).get("checkbox", False),
-        "thesis": _extract_rich_text(p.get("Thesis", {})),
-        "status": _extract_select(p.get("Status", {})),
-        "actual_exit": p.get("Actual Exit", {}).get("number"),
-        "actual_return_pct": p.get("Actual Return %", {}).get("number"),
-        "r_multiple": p.get("R Multiple", {}).get("number"),
-        "deviation_pct": p.get("Deviation %", {}).get("number"),
-        "psych_notes": _extract_rich_text(p.get("Psych Notes", {})),
-        "created": page.get("created_time", "") if isinstance(page, dict) else "",
-    }
+    out = {"page_id": page["id"] if isinstance(page, dict) else str(page.get("id", ""))}
+    for key, field, extract, default in _FIELD_SPEC:
+        prop = p.get(field)
+        out[key] = extract(prop) if prop is not None else default
+    out["created"] = page.get("created_time", "") if isinstance(page, dict) else ""
+    return out
+
+
+# 字段通常齐全, 直接索引 (EAFP), 空值/缺失时落到 except 返回 ""
+_MISSING = (KeyError, IndexError, TypeError)
 
 
 def _extract_title(prop: dict) -> str:
-    items = prop.get("title", [])
-    return items[0]["text"]["content"] if items else ""
+    try:
+        return prop["title"][0]["text"]["content"]
+    except _MISSING:
+        return ""
 
 
 def _extract_select(prop: dict) -> str:
-    sel = prop.get("select")
-    return sel["name"] if sel else ""
+    # 方向/情绪/状态取值来自固定词表: 驻留后各行共享同一对象, 比较与哈希可走指针相等
+    try:
+        return sys.intern(prop["select"]["name"])
+    except _MISSING:
+        return ""
 
 
 def _extract_rich_text(prop: dict) -> str:
-    items = prop.get("rich_text", [])
-    return items[0]["text"]["content"] if items else ""
+    try:
+        return prop["rich_text"][0]["text"]["content"]
+    except _MISSING:
+        return ""
 
 
 def _extract_date(prop: dict) -> str:
-    d = prop.get("date")
-    return d["start"] if d else ""
+    try:
+        return prop["date"]["start"]
+    except _MISSING:
+        return ""
+
+
+def _extract_number(prop: dict) -> float | None:
+    return prop.get("number")
+
+
+def _extract_number_or_zero(prop: dict) -> float:
+    return prop.get("number") or 0
+
+
+def _extract_percent(prop: dict) -> float:
+    return (prop.get("number") or 0) * 100
+
+
+def _extract_checkbox(prop: dict) -> bool:
+    return prop.get("checkbox", False)
+
+
+# (输出键, Notion 字段名, 提取函数, 字段缺失时的默认值)
+_FIELD_SPEC = (
+    ("ticker", "Ticker", _extract_title, ""),
+    ("direction", "Direction", _extract_select, ""),
+    ("entry_price", "Entry Price", _extract_number_or_zero, 0),
+    ("position_pct", "Position %", _extract_percent, 0),
+    ("profit_target", "Profit Target", _extract_number_or_zero, 0),
+    ("risk_reward", "Risk Reward", _extract_number_or_zero, 0),
+    ("win_rate", "Win Rate", _extract_number_or_zero, 0),
+    ("price_stop", "Price Stop", _extract_number_or_zero, 0),
+    ("time_stop", "Time Stop", _extract_date, ""),
+    ("logic_stop", "Logic Stop", _extract_rich_text, ""),
+    ("entry_emotion", "Entry Emotion", _extract_select, ""),
+    ("familiarity", "Familiarity", _extract_number, None),
+    ("technical_confirmed", "Technical Confirmed", _extract_checkbox, False),
+    ("thesis", "Thesis", _extract_rich_text, ""),
+    ("status", "Status", _extract_select, ""),
+    ("actual_exit", "Actual Exit", _extract_number, None),
+    ("actual_return_pct", "Actual Return %", _extract_number, None),
+    ("r_multiple", "R Multiple", _extract_number, None),
+    ("deviation_pct", "Deviation %", _extract_number, None),
+    ("psych_notes", "Psych Notes", _extract_rich_text, ""),
+)
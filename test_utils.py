@@ -0,0 +1,30 @@
+"""utils 单元测试 (python -m unittest)"""
+
+import math
+import unittest
+
+from utils import calc_r_multiple, calc_r_multiples_np
+
+
+class CalcRMultiplesNpTest(unittest.TestCase):
+    def test_matches_scalar(self):
+        rows = [
+            (100.0, 120.0, 90.0, "LONG"),    # 盈利 +2R
+            (100.0, 85.0, 90.0, "LONG"),     # 亏损 -1.5R
+            (100.0, 80.0, 110.0, "SHORT"),   # 盈利 +2R
+            (100.0, 115.0, 110.0, "SHORT"),  # 亏损 -1.5R
+            (100.0, 120.0, 100.0, "LONG"),   # 零风险
+            (100.0, 120.0, 105.0, "LONG"),   # 止损在入场价之上 (风险为负)
+            (100.0, 80.0, 95.0, "SHORT"),    # 止损在入场价之下 (风险为负)
+        ]
+        batch = calc_r_multiples_np(*zip(*rows))
+        self.assertEqual(len(batch), len(rows))
+        for row, got in zip(rows, batch.tolist()):
+            self.assertTrue(math.isclose(got, calc_r_multiple(*row)), row)
+
+    def test_zero_risk_is_zero(self):
+        self.assertEqual(calc_r_multiples_np([50.0], [60.0], [50.0], ["SHORT"]).tolist(), [0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
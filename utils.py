@@ -1,6 +1,12 @@
 """ReflexiveTrader Pro — 工具函数"""
 
+import calendar
+import functools
+
+import numpy as np
+
 from rich.console import Console
+from rich.text import Text
 from rich.theme import Theme
 
 THEME = Theme({
@@ -16,9 +22,8 @@ console = Console(theme=THEME)
 
 
 def fmt_pct(value: float) -> str:
-    sign = "+" if value >= 0 else ""
     style = "profit" if value >= 0 else "loss"
-    return f"[{style}]{sign}{value:.2f}%[/{style}]"
+    return f"[{style}]{value:+.2f}%[/{style}]"
 
 
 def fmt_price(value: float) -> str:
@@ -27,12 +32,26 @@ def fmt_price(value: float) -> str:
 
 def fmt_r(value: float) -> str:
     style = "profit" if value >= 0 else "loss"
-    sign = "+" if value >= 0 else ""
-    return f"[{style}]{sign}{value:.2f}R[/{style}]"
+    return f"[{style}]{value:+.2f}R[/{style}]"
+
+
+# ── Text 版本: 直接返回 rich.Text, 表格渲染时跳过 markup 解析 ──────
+
+def fmt_pct_text(value: float) -> Text:
+    return Text(f"{value:+.2f}%", style="profit" if value >= 0 else "loss")
+
+
+def fmt_price_text(value: float) -> Text:
+    return Text(f"${value:,.2f}")
 
 
+def fmt_r_text(value: float) -> Text:
+    return Text(f"{value:+.2f}R", style="profit" if value >= 0 else "loss")
+
+
+@functools.lru_cache(maxsize=1024)
 def kelly_criterion(win_rate: float, risk_reward: float) -> float:
-    """Kelly 公式: f* = (p*b - q) / b"""
+    """Kelly 公式: f* = (p*b - q) / b (输入来自离散滑块, 结果可缓存)"""
     if risk_reward <= 0:
         return 0.0
     q = 1 - win_rate
@@ -52,3 +71,21 @@ def calc_r_multiple(entry: float, exit_price: float, stop: float, direction: str
         if risk <= 0:
             return 0.0
         return (entry - exit_price) / risk
+
+
+def calc_r_multiples_np(entry, exit_price, stop, direction) -> np.ndarray:
+    """calc_r_multiple 的批量版本: 方向分支由 np.where 完成, 风险 <= 0 时为 0。"""
+    entry, exit_price, stop = (np.asarray(a, dtype=np.float64) for a in (entry, exit_price, stop))
+    is_long = np.asarray(direction) == "LONG"
+    risk = np.where(is_long, entry - stop, stop - entry)
+    pnl = np.where(is_long, exit_price - entry, entry - exit_price)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(risk > 0, pnl / risk, 0.0)
+
+
+@functools.lru_cache(maxsize=64)
+def month_bounds(year: int, month: int) -> tuple[str, str, str]:
+    """某月的查询区间与标识: (start, end, "YYYY-MM")。"""
+    _, last_day = calendar.monthrange(year, month)
+    period = f"{year}-{month:02d}"
+    return f"{period}-01T00:00:00Z", f"{period}-{last_day:02d}T23:59:59Z", period